@@ -0,0 +1,44 @@
+import time
+
+from benchmarks import synthetic
+from examples import demo
+from pixel_font_builder import Glyph, opentype
+
+
+def _create_demo_glyphs() -> list[Glyph]:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files).glyphs
+
+
+def _create_synthetic_glyphs() -> list[Glyph]:
+    return synthetic.create_builder(60000, 16, synthetic.DENSITIES['sparse']).glyphs
+
+
+def _measure_trace(glyphs: list[Glyph]) -> float:
+    start_time = time.perf_counter()
+    for glyph in glyphs:
+        opentype._create_outlines_with_engine(glyph.bitmap_row_masks, glyph.width, 100, opentype.OutlineEngine.TRACE)
+    return time.perf_counter() - start_time
+
+
+def _measure_numpy(glyphs: list[Glyph]) -> float:
+    # the same path as a serial build, the outlines of the glyphs of the same dimensions in one batch
+    start_time = time.perf_counter()
+    opentype._fill_shapes_cache_in_batches(glyphs, 100, False, opentype.DotMode.SEPARATE)
+    return time.perf_counter() - start_time
+
+
+def main():
+    if opentype._load_numpy_outlines() is None:
+        print("the 'numpy' engine requires 'numpy', install it with: pip install numpy")
+        return
+    print(f'{"source":<10} {"glyphs":>7} {"trace (s)":>10} {"numpy (s)":>10} {"speedup":>8}')
+    for source_name, create_glyphs in [('demo', _create_demo_glyphs), ('synthetic', _create_synthetic_glyphs)]:
+        glyphs = create_glyphs()
+        trace_time = _measure_trace(glyphs)
+        numpy_time = _measure_numpy(glyphs)
+        print(f'{source_name:<10} {len(glyphs):>7} {trace_time:>10.3f} {numpy_time:>10.3f} {trace_time / numpy_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
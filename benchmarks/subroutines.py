@@ -0,0 +1,53 @@
+import time
+from io import BytesIO
+
+from benchmarks import synthetic
+from examples import demo
+from pixel_font_builder import FontBuilder, opentype
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def _create_synthetic_builder() -> FontBuilder:
+    return synthetic.create_builder(500, 16, 0.4)
+
+
+def _measure(builder: FontBuilder, dot_mode: opentype.DotMode, subroutinize: bool) -> tuple[float, int, int, opentype.OutlineStats]:
+    builder.opentype_config.dot_mode = dot_mode
+    builder.opentype_config.subroutinize = subroutinize
+    start_time = time.perf_counter()
+    font_builder = opentype.create_builder(builder, False, opentype.Family.DOTTED)
+    stream = BytesIO()
+    font_builder.save(stream)
+    build_time = time.perf_counter() - start_time
+    otf_size = len(stream.getvalue())
+    font_builder.font.flavor = 'woff2'
+    stream = BytesIO()
+    font_builder.save(stream)
+    woff2_size = len(stream.getvalue())
+    outline_stats = opentype.calculate_outline_stats(font_builder.font)
+    return build_time, otf_size, woff2_size, outline_stats
+
+
+def main():
+    variants = [
+        (opentype.DotMode.SEPARATE, False),
+        (opentype.DotMode.COMPOSITE, False),
+        (opentype.DotMode.SEPARATE, True),
+        (opentype.DotMode.COMPOSITE, True),
+    ]
+    for source_name, create_builder in [('demo', _create_demo_builder), ('synthetic', _create_synthetic_builder)]:
+        print(f'# {source_name}')
+        print(f'{"dot mode":<10} {"subroutinize":<13} {"time (s)":>9} {"otf (bytes)":>12} {"woff2 (bytes)":>14} {"contours":>9} {"points":>9}')
+        for dot_mode, subroutinize in variants:
+            # a fresh builder per variant, so that glyph caches do not carry over
+            build_time, otf_size, woff2_size, outline_stats = _measure(create_builder(), dot_mode, subroutinize)
+            print(f'{dot_mode:<10} {str(subroutinize):<13} {build_time:>9.3f} {otf_size:>12} {woff2_size:>14} {outline_stats.contours_count:>9} {outline_stats.points_count:>9}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from benchmarks import synthetic
+from examples import build_dir
+from pixel_font_builder import FontCollectionBuilder, opentype
+
+baseline_file_path = Path(__file__).parent.joinpath('baseline.json')
+
+SCALES = {
+    'small': 1000,
+    'medium': 10000,
+    'large': 60000,
+}
+
+BACKENDS = [
+    'otf-pixel',
+    'otf-dotted',
+    'ttf-pixel',
+    'ttf-dotted',
+    'woff2-pixel',
+    'bdf',
+    'pcf',
+    'otc',
+    'ttc',
+]
+
+_COLLECTION_MEMBERS_COUNT = 4
+
+
+def _run_backend(backend: str, glyphs_count: int, size: int, density: str) -> tuple[float, int]:
+    # runs in a fresh process, so that the peak memory belongs to this case only
+    builder = synthetic.create_builder(glyphs_count, size, synthetic.DENSITIES[density])
+    outputs_dir = build_dir.joinpath('benchmarks')
+    outputs_dir.mkdir(parents=True, exist_ok=True)
+    start_time = time.perf_counter()
+    if backend in ('otc', 'ttc'):
+        collection_builder = FontCollectionBuilder()
+        for name_num in range(_COLLECTION_MEMBERS_COUNT):
+            member_builder = synthetic.create_builder(0, size, name_num=name_num)
+            member_builder.glyphs = builder.glyphs
+            member_builder.character_mapping = builder.character_mapping
+            collection_builder.append(member_builder)
+        start_time = time.perf_counter()
+        collection = opentype.create_collection_builder(collection_builder, backend == 'ttc', opentype.Family.PIXEL)
+        collection.save(BytesIO())
+    elif backend == 'bdf':
+        builder.save_bdf(outputs_dir.joinpath('benchmark.bdf'), streaming=True)
+    elif backend == 'pcf':
+        builder.save_pcf(outputs_dir.joinpath('benchmark.pcf'))
+    else:
+        flavor_name, family_name = backend.split('-')
+        is_ttf = flavor_name == 'ttf'
+        flavor = opentype.Flavor.WOFF2 if flavor_name == 'woff2' else None
+        font_builder = opentype.create_builder(builder, is_ttf, opentype.Family(family_name), flavor)
+        font_builder.save(BytesIO())
+    seconds = time.perf_counter() - start_time
+    # kilobytes on linux, bytes on macos
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_memory //= 1024
+    return seconds, peak_memory
+
+
+def _create_case_name(backend: str, glyphs_count: int, size: int, density: str) -> str:
+    return f'{backend}/{glyphs_count}/{size}px/{density}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every backend on synthetic fonts, and compare against the stored baseline.')
+    parser.add_argument('--scale', choices=SCALES.keys(), default='small')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 16, 32])
+    parser.add_argument('--densities', choices=synthetic.DENSITIES.keys(), nargs='+', default=list(synthetic.DENSITIES))
+    parser.add_argument('--backends', choices=BACKENDS, nargs='+', default=BACKENDS)
+    parser.add_argument('--baseline', type=Path, default=baseline_file_path)
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown against the baseline, as a ratio')
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text('utf-8')) if args.baseline.is_file() else {}
+    glyphs_count = SCALES[args.scale]
+    results = {}
+    regressions = []
+    print(f'{"case":<32} {"time (s)":>9} {"baseline":>9} {"peak (KiB)":>11}')
+    for backend in args.backends:
+        for size in args.sizes:
+            for density in args.densities:
+                case_name = _create_case_name(backend, glyphs_count, size, density)
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    seconds, peak_memory = executor.submit(_run_backend, backend, glyphs_count, size, density).result()
+                results[case_name] = {'seconds': seconds, 'peak_memory': peak_memory}
+                baseline_seconds = baseline.get(case_name, {}).get('seconds')
+                mark = ''
+                if baseline_seconds is not None and seconds > baseline_seconds * (1 + args.tolerance):
+                    regressions.append(case_name)
+                    mark = ' REGRESSION'
+                baseline_text = '-' if baseline_seconds is None else f'{baseline_seconds:.3f}'
+                print(f'{case_name:<32} {seconds:>9.3f} {baseline_text:>9} {peak_memory:>11}{mark}', flush=True)
+
+    if args.save_baseline:
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n', 'utf-8')
+        print(f'baseline saved: {args.baseline}')
+    if len(regressions) > 0:
+        print(f'{len(regressions)} cases slower than the baseline by more than {args.tolerance:.0%}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import datetime
+import random
+
+from pixel_font_builder import FontBuilder, Glyph, WeightName, SerifStyle, SlantStyle, WidthStyle
+
+DENSITIES = {
+    'sparse': 0.15,
+    'dense': 0.5,
+}
+
+
+def create_glyph(name: str, size: int, density: float, rng: random.Random) -> Glyph:
+    bitmap = [[1 if rng.random() < density else 0 for _ in range(size)] for _ in range(size)]
+    return Glyph(
+        name=name,
+        horizontal_origin=(0, -size // 4),
+        advance_width=size,
+        vertical_origin=(-size // 2, 0),
+        advance_height=size,
+        bitmap=bitmap,
+    )
+
+
+def create_builder(
+        glyphs_count: int,
+        size: int = 16,
+        density: float = DENSITIES['sparse'],
+        seed: int = 0,
+        name_num: int = 0,
+) -> FontBuilder:
+    """
+    A font of random square glyphs mapped to consecutive code points from U+4E00, the same for the same arguments.
+    """
+    builder = FontBuilder()
+    builder.font_metric.font_size = size
+    builder.font_metric.horizontal_layout.ascent = size - size // 4
+    builder.font_metric.horizontal_layout.descent = -(size // 4)
+    builder.font_metric.vertical_layout.ascent = size // 2
+    builder.font_metric.vertical_layout.descent = -(size // 2)
+    builder.font_metric.x_height = size // 2
+    builder.font_metric.cap_height = size * 3 // 4
+
+    builder.meta_info.version = '1.0.0'
+    builder.meta_info.created_time = datetime.datetime.fromisoformat('2024-01-01T00:00:00Z')
+    builder.meta_info.modified_time = builder.meta_info.created_time
+    builder.meta_info.family_name = f'Synthetic {name_num}'
+    builder.meta_info.weight_name = WeightName.REGULAR
+    builder.meta_info.serif_style = SerifStyle.SANS_SERIF
+    builder.meta_info.slant_style = SlantStyle.NORMAL
+    builder.meta_info.width_style = WidthStyle.MONOSPACED
+
+    rng = random.Random(seed)
+    builder.glyphs.append(create_glyph('.notdef', size, density, rng))
+    for index in range(glyphs_count - 1):
+        code_point = 0x4E00 + index
+        glyph_name = f'uni{code_point:04X}' if code_point <= 0xFFFF else f'u{code_point:05X}'
+        builder.glyphs.append(create_glyph(glyph_name, size, density, rng))
+        builder.character_mapping[code_point] = glyph_name
+    return builder
@@ -6,7 +6,7 @@ from pathlib import Path
 import png
 
 from examples import glyphs_dir, build_dir
-from pixel_font_builder import FontBuilder, FontCollectionBuilder, WeightName, SerifStyle, SlantStyle, WidthStyle, Glyph, opentype
+from pixel_font_builder import ImportedBitmap, PngImporter, OutputFormat, FontBuilder, FontCollectionBuilder, WeightName, SerifStyle, SlantStyle, WidthStyle, Glyph
 
 
 def _load_bitmap_from_png(file_path: Path) -> tuple[list[list[int]], int, int]:
@@ -36,41 +36,44 @@ def _save_bitmap_to_png(bitmap: list[list[int]], file_path: Path):
 
 class GlyphFile:
     @staticmethod
-    def load(file_path: Path) -> 'GlyphFile':
-        hex_name = file_path.stem.strip()
+    def load(imported_bitmap: ImportedBitmap) -> 'GlyphFile':
+        hex_name = imported_bitmap.file_path.stem.strip()
         code_point = -1 if hex_name == 'notdef' else int(hex_name, 16)
-        return GlyphFile(file_path, code_point)
+        return GlyphFile(imported_bitmap.file_path, code_point, imported_bitmap)
 
     file_path: Path
     code_point: int
-    bitmap: list[list[int]]
+    packed_bitmap: bytes
     width: int
     height: int
 
-    def __init__(self, file_path: Path, code_point: int):
+    def __init__(self, file_path: Path, code_point: int, imported_bitmap: ImportedBitmap):
         self.file_path = file_path
         self.code_point = code_point
-        self.bitmap, self.width, self.height = _load_bitmap_from_png(file_path)
+        self.packed_bitmap = imported_bitmap.packed_bitmap
+        self.width = imported_bitmap.width
+        self.height = imported_bitmap.height
+        self._imported_bitmap = imported_bitmap
 
     @property
     def glyph_name(self) -> str:
         return '.notdef' if self.code_point == -1 else f'{self.code_point:04X}'
 
     def standardized(self):
-        _save_bitmap_to_png(self.bitmap, self.file_path)
+        _save_bitmap_to_png(self._imported_bitmap.bitmap, self.file_path)
         file_path = self.file_path.with_stem('notdef' if self.code_point == -1 else f'{self.code_point:04X}')
         if self.file_path != file_path:
             self.file_path.rename(file_path)
             self.file_path = file_path
 
 
-def _collect_glyph_files() -> tuple[dict[int, str], list[GlyphFile]]:
+def _collect_glyph_files(importer: PngImporter | None = None) -> tuple[dict[int, str], list[GlyphFile]]:
+    if importer is None:
+        importer = PngImporter(build_dir.joinpath('demo-glyphs-index.json'))
     character_mapping = {}
     glyph_files = []
-    for file_path in glyphs_dir.iterdir():
-        if file_path.suffix != '.png':
-            continue
-        glyph_file = GlyphFile.load(file_path)
+    for imported_bitmap in importer.load_dir(glyphs_dir).values():
+        glyph_file = GlyphFile.load(imported_bitmap)
         if glyph_file.code_point != -1:
             character_mapping[glyph_file.code_point] = glyph_file.glyph_name
         glyph_files.append(glyph_file)
@@ -127,8 +130,8 @@ def _create_builder(
                 advance_width=glyph_file.width,
                 vertical_origin=(vertical_origin_x, vertical_origin_y),
                 advance_height=builder.font_metric.font_size,
-                bitmap=glyph_file.bitmap,
             )
+            glyph.set_packed_bitmap(glyph_file.packed_bitmap, glyph_file.width, glyph_file.height)
             glyph_pool[glyph_file.file_path] = glyph
         builder.glyphs.append(glyph)
 
@@ -141,18 +144,27 @@ def main():
         shutil.rmtree(outputs_dir)
     outputs_dir.mkdir(parents=True)
 
-    character_mapping, glyph_files = _collect_glyph_files()
-    for glyph_file in glyph_files:
-        glyph_file.standardized()
+    # only the files changed since the last build are decoded and standardized,
+    # then collected again, so that the index holds their rewritten mtime and size
+    importer = PngImporter(build_dir.joinpath('demo-glyphs-index.json'))
+    character_mapping, glyph_files = _collect_glyph_files(importer)
+    changed_file_paths = set(importer.decoded_file_paths)
+    if len(changed_file_paths) > 0:
+        for glyph_file in glyph_files:
+            if glyph_file.file_path in changed_file_paths:
+                glyph_file.standardized()
+        character_mapping, glyph_files = _collect_glyph_files(importer)
 
     glyph_pool = {}
 
     builder = _create_builder(glyph_pool, character_mapping, glyph_files)
-    builder.save_otf(outputs_dir.joinpath('demo.otf'))
-    builder.save_otf(outputs_dir.joinpath('demo.woff2'), flavor=opentype.Flavor.WOFF2)
-    builder.save_ttf(outputs_dir.joinpath('demo.ttf'))
-    builder.save_bdf(outputs_dir.joinpath('demo.bdf'))
-    builder.save_pcf(outputs_dir.joinpath('demo.pcf'))
+    builder.save_all({
+        outputs_dir.joinpath('demo.otf'): OutputFormat.OTF,
+        outputs_dir.joinpath('demo.woff2'): OutputFormat.OTF_WOFF2,
+        outputs_dir.joinpath('demo.ttf'): OutputFormat.TTF,
+        outputs_dir.joinpath('demo.bdf'): OutputFormat.BDF,
+        outputs_dir.joinpath('demo.pcf'): OutputFormat.PCF,
+    })
 
     collection_builder = FontCollectionBuilder()
     for index in range(100):
@@ -1,4 +1,9 @@
+from pixel_font_builder.atlas import AtlasEntry, GlyphAtlas
 from pixel_font_builder.builder import FontBuilder, FontCollectionBuilder
+from pixel_font_builder.export import OutputFormat
 from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.importer import ImportedBitmap, PngImporter
+from pixel_font_builder.manifest import BuildManifest, BuildReport
 from pixel_font_builder.meta import WeightName, SerifStyle, SlantStyle, WidthStyle, MetaInfo
 from pixel_font_builder.metric import FontLayoutHeader, FontMetric
+from pixel_font_builder.provider import GlyphProvider
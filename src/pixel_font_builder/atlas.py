@@ -0,0 +1,368 @@
+import csv
+import json
+import mmap
+import os
+from collections.abc import Iterable, Sequence
+from os import PathLike
+from pathlib import Path
+from typing import Any
+
+from pixel_font_builder.glyph import Glyph, create_alpha_table
+
+_BITS_TO_ALPHA = bytes.maketrans(b'01', b'\x00\xff')
+
+_CSV_FIELD_NAMES = [
+    'name',
+    'code_points',
+    'x',
+    'y',
+    'width',
+    'height',
+    'horizontal_origin_x',
+    'horizontal_origin_y',
+    'advance_width',
+    'vertical_origin_x',
+    'vertical_origin_y',
+    'advance_height',
+]
+
+
+class AtlasEntry:
+    """
+    The rect of a glyph in the atlas, and its metrics.
+    """
+
+    name: str
+    code_points: list[int]
+    x: int
+    y: int
+    width: int
+    height: int
+    horizontal_origin: tuple[int, int]
+    advance_width: int
+    vertical_origin: tuple[int, int]
+    advance_height: int
+
+    def __init__(
+            self,
+            name: str,
+            x: int,
+            y: int,
+            width: int,
+            height: int,
+            code_points: list[int] | None = None,
+            horizontal_origin: tuple[int, int] = (0, 0),
+            advance_width: int = 0,
+            vertical_origin: tuple[int, int] = (0, 0),
+            advance_height: int = 0,
+    ):
+        self.name = name
+        if code_points is None:
+            code_points = []
+        self.code_points = code_points
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.horizontal_origin = horizontal_origin
+        self.advance_width = advance_width
+        self.vertical_origin = vertical_origin
+        self.advance_height = advance_height
+
+
+def _load_json_index(file_path: Path) -> tuple[dict[str, Any], list[AtlasEntry]]:
+    index = json.loads(file_path.read_text('utf-8'))
+    entries = []
+    for item in index['glyphs']:
+        x, y, width, height = item['rect']
+        entries.append(AtlasEntry(
+            name=item['name'],
+            x=x,
+            y=y,
+            width=width,
+            height=height,
+            code_points=item.get('code_points'),
+            horizontal_origin=tuple(item.get('horizontal_origin', (0, 0))),
+            advance_width=item.get('advance_width', 0),
+            vertical_origin=tuple(item.get('vertical_origin', (0, 0))),
+            advance_height=item.get('advance_height', 0),
+        ))
+    return index['bitmap'], entries
+
+
+def _load_csv_index(file_path: Path) -> list[AtlasEntry]:
+    entries = []
+    with open(file_path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            entries.append(AtlasEntry(
+                name=row['name'],
+                x=int(row['x']),
+                y=int(row['y']),
+                width=int(row['width']),
+                height=int(row['height']),
+                code_points=[int(code_point, 16) for code_point in row['code_points'].split()],
+                horizontal_origin=(int(row['horizontal_origin_x']), int(row['horizontal_origin_y'])),
+                advance_width=int(row['advance_width']),
+                vertical_origin=(int(row['vertical_origin_x']), int(row['vertical_origin_y'])),
+                advance_height=int(row['advance_height']),
+            ))
+    return entries
+
+
+def _save_index(file_path: Path, layout: dict[str, Any], entries: list[AtlasEntry]):
+    if file_path.suffix == '.csv':
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(_CSV_FIELD_NAMES)
+            for entry in entries:
+                writer.writerow([
+                    entry.name,
+                    ' '.join(f'{code_point:04X}' for code_point in entry.code_points),
+                    entry.x,
+                    entry.y,
+                    entry.width,
+                    entry.height,
+                    *entry.horizontal_origin,
+                    entry.advance_width,
+                    *entry.vertical_origin,
+                    entry.advance_height,
+                ])
+    else:
+        index = {
+            'bitmap': layout,
+            'glyphs': [{
+                'name': entry.name,
+                'code_points': entry.code_points,
+                'rect': [entry.x, entry.y, entry.width, entry.height],
+                'horizontal_origin': list(entry.horizontal_origin),
+                'advance_width': entry.advance_width,
+                'vertical_origin': list(entry.vertical_origin),
+                'advance_height': entry.advance_height,
+            } for entry in entries],
+        }
+        file_path.write_text(json.dumps(index), 'utf-8')
+
+
+class GlyphAtlas(Sequence[Glyph]):
+    """
+    Glyphs read from one raw bitmap file, instead of a file per glyph.
+
+    The bitmap file is row-major, either 1 bit per pixel, most significant bit first, every row padded to a byte,
+    or 8 bits per pixel, where a pixel is lit if its value is greater than `alpha_threshold`.
+    It is memory-mapped, and a glyph is sliced from it and created only on first access.
+
+    It is also a `GlyphProvider`: assigned to `FontBuilder.glyphs`, the backends load the glyphs one at a time
+    and none are kept. Update `FontBuilder.character_mapping` with `character_mapping`.
+    """
+
+    @staticmethod
+    def load(
+            bitmap_file_path: str | PathLike[str],
+            index_file_path: str | PathLike[str],
+            width: int | None = None,
+            depth: int = 1,
+            offset: int = 0,
+            alpha_threshold: int = 127,
+    ) -> 'GlyphAtlas':
+        """
+        Load a '.json' or a '.csv' index. A JSON index holds the bitmap layout, for a CSV index pass `width` and `depth`.
+        """
+        index_file_path = Path(index_file_path)
+        if index_file_path.suffix == '.csv':
+            if width is None:
+                raise ValueError('the bitmap width is required for a CSV index')
+            entries = _load_csv_index(index_file_path)
+        else:
+            layout, entries = _load_json_index(index_file_path)
+            width = layout['width']
+            depth = layout.get('depth', 1)
+            offset = layout.get('offset', 0)
+        return GlyphAtlas(bitmap_file_path, entries, width, depth, offset, alpha_threshold)
+
+    @staticmethod
+    def save(
+            glyphs: Iterable[Glyph],
+            character_mapping: dict[int, str],
+            bitmap_file_path: str | PathLike[str],
+            index_file_path: str | PathLike[str],
+            width: int = 1024,
+            depth: int = 1,
+    ) -> 'GlyphAtlas':
+        """
+        Lay out the glyphs in rows from the top left, and save the bitmap file and the index.
+        """
+        glyph_name_to_code_points = {}
+        for code_point, glyph_name in sorted(character_mapping.items()):
+            glyph_name_to_code_points.setdefault(glyph_name, []).append(code_point)
+
+        entries = []
+        masks = []
+        x = 0
+        y = 0
+        shelf_height = 0
+        for glyph in glyphs:
+            if glyph.width > width:
+                raise ValueError(f'glyph wider than the atlas: {repr(glyph.name)}')
+            if x + glyph.width > width:
+                x = 0
+                y += shelf_height
+                shelf_height = 0
+            entries.append(AtlasEntry(
+                name=glyph.name,
+                x=x,
+                y=y,
+                width=glyph.width,
+                height=glyph.height,
+                code_points=glyph_name_to_code_points.get(glyph.name, []),
+                horizontal_origin=glyph.horizontal_origin,
+                advance_width=glyph.advance_width,
+                vertical_origin=glyph.vertical_origin,
+                advance_height=glyph.advance_height,
+            ))
+            masks.append(glyph.bitmap_row_masks)
+            x += glyph.width
+            shelf_height = max(shelf_height, glyph.height)
+
+        rows = [0] * (y + shelf_height)
+        for entry, row_masks in zip(entries, masks):
+            for i, mask in enumerate(row_masks):
+                rows[entry.y + i] |= mask << (width - entry.x - entry.width)
+        row_size = (width + 7) // 8
+        with open(bitmap_file_path, 'wb') as file:
+            for row in rows:
+                if depth == 1:
+                    file.write((row << (row_size * 8 - width)).to_bytes(row_size, 'big'))
+                elif width > 0:
+                    file.write(format(row, f'0{width}b').encode().translate(_BITS_TO_ALPHA))
+
+        index_file_path = Path(index_file_path)
+        _save_index(index_file_path, {'width': width, 'depth': depth, 'offset': 0}, entries)
+        return GlyphAtlas(bitmap_file_path, entries, width, depth)
+
+    bitmap_file_path: Path
+    entries: list[AtlasEntry]
+    width: int
+    depth: int
+    offset: int
+    alpha_threshold: int
+
+    def __init__(
+            self,
+            bitmap_file_path: str | PathLike[str],
+            entries: list[AtlasEntry],
+            width: int,
+            depth: int = 1,
+            offset: int = 0,
+            alpha_threshold: int = 127,
+    ):
+        if depth not in (1, 8):
+            raise ValueError(f'unsupported bitmap depth: {depth}')
+        self.bitmap_file_path = Path(bitmap_file_path)
+        self.entries = entries
+        self.width = width
+        self.depth = depth
+        self.offset = offset
+        self.alpha_threshold = alpha_threshold
+        self._open()
+
+    def _open(self):
+        self._glyphs = [None] * len(self.entries)
+        self._glyph_name_to_index = {entry.name: index for index, entry in enumerate(self.entries)}
+        self._row_stride = (self.width + 7) // 8 if self.depth == 1 else self.width
+        file_size = os.path.getsize(self.bitmap_file_path)
+        height = (file_size - self.offset) // self._row_stride if self._row_stride > 0 else 0
+        for entry in self.entries:
+            if entry.x < 0 or entry.y < 0 or entry.x + entry.width > self.width or entry.y + entry.height > height:
+                raise ValueError(f'glyph rect out of the atlas: {repr(entry.name)}')
+        if file_size > 0:
+            with open(self.bitmap_file_path, 'rb') as file:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b''
+
+    def __getstate__(self) -> dict[str, Any]:
+        # a pickled atlas maps the same file again, the glyphs already created are not sent
+        return {
+            'bitmap_file_path': self.bitmap_file_path,
+            'entries': self.entries,
+            'width': self.width,
+            'depth': self.depth,
+            'offset': self.offset,
+            'alpha_threshold': self.alpha_threshold,
+        }
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__dict__.update(state)
+        self._open()
+
+    def __enter__(self) -> 'GlyphAtlas':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    @property
+    def character_mapping(self) -> dict[int, str]:
+        return {code_point: entry.name for entry in self.entries for code_point in entry.code_points}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        glyph = self._glyphs[index]
+        if glyph is None:
+            glyph = self._create_glyph(self.entries[index])
+            self._glyphs[index] = glyph
+        return glyph
+
+    def get_glyph_names(self) -> list[str]:
+        return [entry.name for entry in self.entries]
+
+    def load_glyph(self, glyph_name: str) -> Glyph:
+        """
+        A new glyph on every call, unlike the item access, which keeps the glyphs it creates.
+        """
+        return self._create_glyph(self.entries[self._glyph_name_to_index[glyph_name]])
+
+    def _create_glyph(self, entry: AtlasEntry) -> Glyph:
+        glyph = Glyph(
+            name=entry.name,
+            horizontal_origin=entry.horizontal_origin,
+            advance_width=entry.advance_width,
+            vertical_origin=entry.vertical_origin,
+            advance_height=entry.advance_height,
+        )
+        glyph.set_packed_bitmap(self.read_packed_bitmap(entry), entry.width, entry.height)
+        return glyph
+
+    def read_packed_bitmap(self, entry: AtlasEntry) -> bytes:
+        """
+        Slice the rect of the entry from the bitmap file, packed in the same layout as `Glyph.packed_bitmap`.
+        """
+        row_size = (entry.width + 7) // 8
+        if row_size == 0:
+            return b''
+        padding = row_size * 8 - entry.width
+        data = bytearray()
+        if self.depth == 1:
+            start_byte = entry.x // 8
+            end_byte = (entry.x + entry.width + 7) // 8
+            shift = (end_byte - start_byte) * 8 - (entry.x - start_byte * 8) - entry.width
+            row_mask = (1 << entry.width) - 1
+            for y in range(entry.y, entry.y + entry.height):
+                position = self.offset + y * self._row_stride
+                mask = (int.from_bytes(self._data[position + start_byte:position + end_byte], 'big') >> shift) & row_mask
+                data += (mask << padding).to_bytes(row_size, 'big')
+        else:
+            alpha_table = create_alpha_table(self.alpha_threshold)
+            for y in range(entry.y, entry.y + entry.height):
+                position = self.offset + y * self._row_stride + entry.x
+                bits = self._data[position:position + entry.width].translate(alpha_table)
+                data += (int(bits, 2) << padding).to_bytes(row_size, 'big')
+        return bytes(data)
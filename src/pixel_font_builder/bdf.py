@@ -1,9 +1,12 @@
 import math
-from collections import ChainMap
+from collections.abc import Mapping
+from os import PathLike
 
 from bdffont import BdfFont, BdfGlyph
 
 import pixel_font_builder
+from pixel_font_builder.cmap import CodePointIndex
+from pixel_font_builder.glyph import Glyph
 from pixel_font_builder.meta import SerifStyle, SlantStyle, WidthStyle
 
 _DEFAULT_CHAR = 0xFFFE
@@ -25,12 +28,22 @@ class Config:
         self.only_basic_plane = only_basic_plane
 
 
-def create_builder(context: 'pixel_font_builder.FontBuilder') -> BdfFont:
+def _collect_glyphs(context: 'pixel_font_builder.FontBuilder', code_point_index: CodePointIndex) -> list[tuple[int, str]]:
+    # only the names, the glyphs are looked up one at a time when written, so that lazily provided glyphs are not all held at once
+    return list(code_point_index.items(context.bdf_config.only_basic_plane, _DEFAULT_CHAR))
+
+
+def _calculate_scalable_width(context: 'pixel_font_builder.FontBuilder', glyph: Glyph) -> int:
+    return math.ceil((glyph.advance_width / context.font_metric.font_size) * (75 / context.bdf_config.resolution_x) * 1000)
+
+
+def _create_font(context: 'pixel_font_builder.FontBuilder', glyphs_count: int, total_width: int) -> BdfFont:
+    """
+    The font with the header and the properties, but without glyphs.
+    """
     config = context.bdf_config
     font_metric = context.font_metric
     meta_info = context.meta_info
-    character_mapping = ChainMap({_DEFAULT_CHAR: '.notdef'}, context.character_mapping)
-    _, name_to_glyph = context.prepare_glyphs()
 
     font = BdfFont(
         point_size=font_metric.font_size,
@@ -38,19 +51,6 @@ def create_builder(context: 'pixel_font_builder.FontBuilder') -> BdfFont:
         bounding_box=(font_metric.font_size, font_metric.horizontal_layout.line_height, 0, font_metric.horizontal_layout.descent),
     )
 
-    for code_point, glyph_name in sorted(character_mapping.items()):
-        if code_point > 0xFFFF and config.only_basic_plane:
-            break
-        glyph = name_to_glyph[glyph_name]
-        font.glyphs.append(BdfGlyph(
-            name=glyph_name,
-            encoding=code_point,
-            scalable_width=(math.ceil((glyph.advance_width / font_metric.font_size) * (75 / config.resolution_x) * 1000), 0),
-            device_width=(glyph.advance_width, 0),
-            bounding_box=(glyph.width, glyph.height, glyph.horizontal_origin_x, glyph.horizontal_origin_y),
-            bitmap=glyph.bitmap,
-        ))
-
     font.properties.foundry = meta_info.manufacturer
     font.properties.family_name = meta_info.family_name
     font.properties.weight_name = meta_info.weight_name
@@ -83,7 +83,7 @@ def create_builder(context: 'pixel_font_builder.FontBuilder') -> BdfFont:
         font.properties.spacing = 'D'
     elif meta_info.width_style == WidthStyle.PROPORTIONAL:
         font.properties.spacing = 'P'
-    font.properties.average_width = round(sum([glyph.device_width_x * 10 for glyph in font.glyphs]) / len(font.glyphs))
+    font.properties.average_width = round(total_width * 10 / glyphs_count)
     font.properties.charset_registry = 'ISO10646'
     font.properties.charset_encoding = '1'
     font.generate_name_as_xlfd()
@@ -99,3 +99,82 @@ def create_builder(context: 'pixel_font_builder.FontBuilder') -> BdfFont:
     font.properties['LICENSE'] = meta_info.license_info
 
     return font
+
+
+def create_builder(context: 'pixel_font_builder.FontBuilder', prepared_glyphs: tuple[list[str], Mapping[str, Glyph], CodePointIndex] | None = None) -> BdfFont:
+    profiler = context.profiler
+    if prepared_glyphs is None:
+        with profiler.phase('prepare_glyphs'):
+            prepared_glyphs = context.prepare_glyphs()
+    _, name_to_glyph, code_point_index = prepared_glyphs
+    with profiler.phase('bdf.create'):
+        glyphs = _collect_glyphs(context, code_point_index)
+        font = _create_font(context, len(glyphs), sum(name_to_glyph[glyph_name].advance_width for _, glyph_name in glyphs))
+        for code_point, glyph_name in glyphs:
+            glyph = name_to_glyph[glyph_name]
+            font.glyphs.append(BdfGlyph(
+                name=glyph_name,
+                encoding=code_point,
+                scalable_width=(_calculate_scalable_width(context, glyph), 0),
+                device_width=(glyph.advance_width, 0),
+                bounding_box=(glyph.width, glyph.height, glyph.horizontal_origin_x, glyph.horizontal_origin_y),
+                bitmap=glyph.lazy_bitmap,
+            ))
+    profiler.count('bdf.glyphs', len(glyphs))
+    return font
+
+
+def save_streaming(context: 'pixel_font_builder.FontBuilder', file_path: str | PathLike[str], prepared_glyphs: tuple[list[str], Mapping[str, Glyph], CodePointIndex] | None = None):
+    """
+    Same output as `create_builder(context).save(file_path)`, but every glyph block is written straight from the packed bitmap,
+    so no `BdfGlyph` or expanded bitmap is ever held for more than one glyph.
+    """
+    profiler = context.profiler
+    if prepared_glyphs is None:
+        with profiler.phase('prepare_glyphs'):
+            prepared_glyphs = context.prepare_glyphs()
+    _, name_to_glyph, code_point_index = prepared_glyphs
+    with profiler.phase('bdf.save'):
+        glyphs = _collect_glyphs(context, code_point_index)
+        font = _create_font(context, len(glyphs), sum(name_to_glyph[glyph_name].advance_width for _, glyph_name in glyphs))
+
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write(f'STARTFONT {font.spec_version}\n')
+            for comment in font.comments:
+                file.write(f'COMMENT {comment}\n')
+            file.write(f'FONT {font.name}\n')
+            file.write(f'SIZE {font.point_size} {font.resolution_x} {font.resolution_y}\n')
+            file.write(f'FONTBOUNDINGBOX {font.width} {font.height} {font.origin_x} {font.origin_y}\n')
+
+            file.write(f'STARTPROPERTIES {len(font.properties)}\n')
+            for comment in font.properties.comments:
+                file.write(f'COMMENT {comment}\n')
+            for word, value in font.properties.items():
+                if isinstance(value, str):
+                    value = value.replace('"', '""')
+                    value = f'"{value}"'
+                file.write(f'{word} {value}\n')
+            file.write('ENDPROPERTIES\n')
+
+            file.write(f'CHARS {len(glyphs)}\n')
+            for code_point, glyph_name in glyphs:
+                glyph = name_to_glyph[glyph_name]
+                file.write(f'STARTCHAR {glyph_name}\n')
+                file.write(f'ENCODING {code_point}\n')
+                file.write(f'SWIDTH {_calculate_scalable_width(context, glyph)} 0\n')
+                file.write(f'DWIDTH {glyph.advance_width} 0\n')
+                file.write(f'BBX {glyph.width} {glyph.height} {glyph.horizontal_origin_x} {glyph.horizontal_origin_y}\n')
+                file.write('BITMAP\n')
+                # a packed row is already the BDF hex row: most significant bit first, padded to a byte
+                packed_bitmap = glyph.packed_bitmap
+                row_size = glyph.bitmap_row_size
+                if row_size == 0:
+                    # a zero-width glyph still has its rows, each an empty line
+                    file.write('\n' * glyph.height)
+                else:
+                    for i in range(0, row_size * glyph.height, row_size):
+                        file.write(f'{packed_bitmap[i:i + row_size].hex().upper()}\n')
+                file.write('ENDCHAR\n')
+
+            file.write('ENDFONT\n')
+    profiler.count('bdf.glyphs', len(glyphs))
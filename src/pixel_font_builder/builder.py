@@ -1,4 +1,6 @@
+import time
 from collections import UserList
+from collections.abc import Mapping
 from os import PathLike
 
 import bdffont
@@ -6,20 +8,40 @@ import fontTools.fontBuilder
 import fontTools.ttLib
 import pcffont
 
-from pixel_font_builder import opentype, bdf, pcf
+from pixel_font_builder import opentype, bdf, pcf, export, split, sfnt
+from pixel_font_builder.cmap import CodePointIndex
+from pixel_font_builder.export import OutputFormat
 from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.manifest import BuildManifest, BuildReport, calculate_glyph_hash
 from pixel_font_builder.meta import MetaInfo
 from pixel_font_builder.metric import FontMetric
+from pixel_font_builder.profiling import Profiler
+from pixel_font_builder.provider import GlyphProvider, ProvidedGlyphs
+
+
+def _find_duplicate_glyphs(glyph_order: list[str], name_to_glyph: Mapping[str, Glyph]) -> dict[str, str]:
+    # '.notdef' is never merged, a code point mapped to it would be shown as missing
+    duplicate_glyph_names = {}
+    hash_to_glyph_name = {}
+    for glyph_name in glyph_order[1:]:
+        glyph_hash = calculate_glyph_hash(name_to_glyph[glyph_name])
+        canonical_glyph_name = hash_to_glyph_name.setdefault(glyph_hash, glyph_name)
+        if canonical_glyph_name != glyph_name:
+            duplicate_glyph_names[glyph_name] = canonical_glyph_name
+    return duplicate_glyph_names
 
 
 class FontBuilder:
     font_metric: FontMetric
     meta_info: MetaInfo
     character_mapping: dict[int, str]
-    glyphs: list[Glyph]
+    glyphs: list[Glyph] | GlyphProvider
     opentype_config: opentype.Config
     bdf_config: bdf.Config
     pcf_config: pcf.Config
+    profiler: Profiler
+    deduplicate_glyphs: bool
+    merged_glyph_names: dict[str, str]
 
     def __init__(self):
         self.font_metric = FontMetric()
@@ -29,17 +51,41 @@ class FontBuilder:
         self.opentype_config = opentype.Config()
         self.bdf_config = bdf.Config()
         self.pcf_config = pcf.Config()
+        self.profiler = Profiler(enabled=False)
+        self.deduplicate_glyphs = False
+        self.merged_glyph_names = {}
+
+    def prepare_glyphs(self) -> tuple[list[str], Mapping[str, Glyph], CodePointIndex]:
+        """
+        The glyph order, the name to glyph mapping and the sorted character mapping. With a `GlyphProvider`, only the glyph names are read here,
+        and the mapping loads a glyph on every lookup.
 
-    def prepare_glyphs(self) -> tuple[list[str], dict[str, Glyph]]:
+        With `deduplicate_glyphs`, the glyphs with the same bitmap and metrics as an earlier glyph in the order are left out,
+        and the code points of the merged glyphs are mapped to the earlier glyphs in the build, `character_mapping` itself is left as is.
+        The merged glyph names are kept in `merged_glyph_names`. Feature files must not refer to the merged glyphs.
+
+        The backends take all three together, a character mapping is sorted only once per build.
+        """
         glyph_order = ['.notdef']
-        name_to_glyph = {}
 
-        for glyph in self.glyphs:
-            if glyph.name in name_to_glyph:
-                raise RuntimeError(f'duplicate glyphs: {repr(glyph.name)}')
-            if glyph.name != '.notdef':
-                glyph_order.append(glyph.name)
-            name_to_glyph[glyph.name] = glyph
+        if isinstance(self.glyphs, GlyphProvider):
+            glyph_names = self.glyphs.get_glyph_names()
+            seen_glyph_names = set()
+            for glyph_name in glyph_names:
+                if glyph_name in seen_glyph_names:
+                    raise RuntimeError(f'duplicate glyphs: {repr(glyph_name)}')
+                if glyph_name != '.notdef':
+                    glyph_order.append(glyph_name)
+                seen_glyph_names.add(glyph_name)
+            name_to_glyph = ProvidedGlyphs(self.glyphs, glyph_names)
+        else:
+            name_to_glyph = {}
+            for glyph in self.glyphs:
+                if glyph.name in name_to_glyph:
+                    raise RuntimeError(f'duplicate glyphs: {repr(glyph.name)}')
+                if glyph.name != '.notdef':
+                    glyph_order.append(glyph.name)
+                name_to_glyph[glyph.name] = glyph
 
         if '.notdef' not in name_to_glyph:
             raise RuntimeError("missing glyph: '.notdef'")
@@ -50,42 +96,153 @@ class FontBuilder:
             if glyph_name not in name_to_glyph:
                 raise RuntimeError(f'missing glyph: {repr(glyph_name)}')
 
-        return glyph_order, name_to_glyph
+        character_mapping = self.character_mapping
+        if self.deduplicate_glyphs:
+            self.merged_glyph_names = _find_duplicate_glyphs(glyph_order, name_to_glyph)
+            if len(self.merged_glyph_names) > 0:
+                character_mapping = {code_point: self.merged_glyph_names.get(glyph_name, glyph_name) for code_point, glyph_name in character_mapping.items()}
+                glyph_order = [glyph_name for glyph_name in glyph_order if glyph_name not in self.merged_glyph_names]
+                if isinstance(name_to_glyph, ProvidedGlyphs):
+                    name_to_glyph = ProvidedGlyphs(name_to_glyph.provider, [glyph_name for glyph_name in name_to_glyph.glyph_names if glyph_name not in self.merged_glyph_names])
+                else:
+                    name_to_glyph = {glyph_name: glyph for glyph_name, glyph in name_to_glyph.items() if glyph_name not in self.merged_glyph_names}
+            self.profiler.count('glyphs_merged', len(self.merged_glyph_names))
+
+        return glyph_order, name_to_glyph, CodePointIndex(character_mapping)
 
     def to_otf_builder(self, flavor: opentype.Flavor | None = None) -> fontTools.fontBuilder.FontBuilder:
         return opentype.create_builder(self, False, flavor=flavor)
 
-    def save_otf(self, file_path: str | PathLike[str], flavor: opentype.Flavor | None = None):
-        self.to_otf_builder(flavor).save(file_path)
+    def save_otf(self, file_path: str | PathLike[str], flavor: opentype.Flavor | None = None, streaming: bool = False):
+        """
+        With `streaming`, an uncompressed font is written into the file table by table, see `sfnt.save_font`.
+        WOFF and WOFF2 are compressed as a whole, so a flavor is always saved by fontTools.
+        """
+        builder = self.to_otf_builder(flavor)
+        with self.profiler.phase('opentype.save'):
+            if streaming and flavor is None:
+                sfnt.save_font(builder.font, file_path)
+            else:
+                builder.save(file_path)
 
     def to_ttf_builder(self, flavor: opentype.Flavor | None = None) -> fontTools.fontBuilder.FontBuilder:
         return opentype.create_builder(self, True, flavor=flavor)
 
-    def save_ttf(self, file_path: str | PathLike[str], flavor: opentype.Flavor | None = None):
-        self.to_ttf_builder(flavor).save(file_path)
+    def save_ttf(self, file_path: str | PathLike[str], flavor: opentype.Flavor | None = None, streaming: bool = False):
+        """
+        With `streaming`, an uncompressed font is written into the file table by table, see `sfnt.save_font`.
+        WOFF and WOFF2 are compressed as a whole, so a flavor is always saved by fontTools.
+        """
+        builder = self.to_ttf_builder(flavor)
+        with self.profiler.phase('opentype.save'):
+            if streaming and flavor is None:
+                sfnt.save_font(builder.font, file_path)
+            else:
+                builder.save(file_path)
 
     def to_bdf_builder(self) -> bdffont.BdfFont:
         return bdf.create_builder(self)
 
-    def save_bdf(self, file_path: str | PathLike[str]):
-        self.to_bdf_builder().save(file_path)
+    def save_bdf(self, file_path: str | PathLike[str], streaming: bool = False):
+        if streaming:
+            bdf.save_streaming(self, file_path)
+        else:
+            builder = self.to_bdf_builder()
+            with self.profiler.phase('bdf.save'):
+                builder.save(file_path)
 
     def to_pcf_builder(self) -> pcffont.PcfFontBuilder:
         return pcf.create_builder(self)
 
     def save_pcf(self, file_path: str | PathLike[str]):
-        self.to_pcf_builder().save(file_path)
+        builder = self.to_pcf_builder()
+        with self.profiler.phase('pcf.save'):
+            builder.save(file_path)
+
+    def save_split(
+            self,
+            dir_path: str | PathLike[str],
+            partitions: list[dict[int, str]],
+            file_name_prefix: str,
+            is_ttf: bool = False,
+            flavor: opentype.Flavor | None = opentype.Flavor.WOFF2,
+            css_file_name: str | None = 'fonts.css',
+            workers: int = 1,
+    ) -> list[split.SplitFont]:
+        """
+        Save the font split into small fonts for the web, one per partition of `character_mapping`,
+        see `split.partition_by_ranges` and `split.partition_by_frequencies`.
+        """
+        return split.save_split(self, dir_path, partitions, file_name_prefix, is_ttf, flavor, css_file_name, workers)
+
+    def save_all(
+            self,
+            outputs: dict[str | PathLike[str], OutputFormat],
+            manifest: BuildManifest | None = None,
+            workers: int = 1,
+    ) -> BuildReport:
+        """
+        Save to many files at once. The glyphs are prepared only once, and the OTF and TTF tables are compiled only once
+        no matter how many flavors are requested. With more than one worker, the formats are exported concurrently
+        in worker processes.
+
+        With a manifest, the outlines of the glyphs unchanged since the last build are reused from it,
+        and the manifest is updated after all files are saved.
+
+        The glyphs in the report are reused when every OTF and TTF output got their outlines from a cache,
+        and recompiled otherwise. Without OTF and TTF outputs, no glyph is either.
+        """
+        start_time = time.perf_counter()
+        with self.profiler.phase('prepare_glyphs'):
+            prepared_glyphs = self.prepare_glyphs()
+        glyphs = prepared_glyphs[1].values()
+        if manifest is None:
+            report = BuildReport()
+            cache = None
+        else:
+            report = manifest.compare(glyphs)
+            cache = manifest.cache
+        if self.deduplicate_glyphs:
+            report.merged_glyph_names.update(self.merged_glyph_names)
+        report.stage_timings['prepare'] = time.perf_counter() - start_time
+        stage_timings, compiled_glyph_names = export.export(self, outputs, prepared_glyphs, cache, workers)
+        report.stage_timings.update(stage_timings)
+        if compiled_glyph_names is not None:
+            for glyph in glyphs:
+                if glyph.name in compiled_glyph_names:
+                    report.recompiled_glyph_names.append(glyph.name)
+                else:
+                    report.reused_glyph_names.append(glyph.name)
+        if manifest is not None:
+            manifest.update(glyphs)
+            manifest.save()
+        report.stage_timings['total'] = time.perf_counter() - start_time
+        return report
 
 
 class FontCollectionBuilder(UserList[FontBuilder]):
     def to_otc_builder(self) -> fontTools.ttLib.TTCollection:
         return opentype.create_collection_builder(self, False)
 
-    def save_otc(self, file_path: str | PathLike[str], share_tables: bool = True):
-        self.to_otc_builder().save(file_path, share_tables)
+    def save_otc(self, file_path: str | PathLike[str], share_tables: bool = True, streaming: bool = False):
+        """
+        With `streaming`, the member fonts are written into the file table by table, see `sfnt.save_collection`.
+        """
+        collection_builder = self.to_otc_builder()
+        if streaming:
+            sfnt.save_collection(collection_builder.fonts, file_path, share_tables)
+        else:
+            collection_builder.save(file_path, share_tables)
 
     def to_ttc_builder(self) -> fontTools.ttLib.TTCollection:
         return opentype.create_collection_builder(self, True)
 
-    def save_ttc(self, file_path: str | PathLike[str], share_tables: bool = True):
-        self.to_ttc_builder().save(file_path, share_tables)
+    def save_ttc(self, file_path: str | PathLike[str], share_tables: bool = True, streaming: bool = False):
+        """
+        With `streaming`, the member fonts are written into the file table by table, see `sfnt.save_collection`.
+        """
+        collection_builder = self.to_ttc_builder()
+        if streaming:
+            sfnt.save_collection(collection_builder.fonts, file_path, share_tables)
+        else:
+            collection_builder.save(file_path, share_tables)
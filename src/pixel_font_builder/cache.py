@@ -0,0 +1,115 @@
+import sqlite3
+from os import PathLike
+from typing import Any
+
+_WRITES_PER_COMMIT = 256
+
+
+class GlyphCache:
+    """
+    A persistent, content-addressed cache of compiled glyph data, backed by a single sqlite file.
+
+    Entries are evicted in least-recently-used order once the total size exceeds `max_size` bytes.
+    The file can be shared across builds and processes.
+    """
+
+    file_path: str | PathLike[str]
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(
+            self,
+            file_path: str | PathLike[str],
+            max_size: int = 256 * 1024 * 1024,
+    ):
+        self.file_path = file_path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self):
+        self._pending_writes = 0
+        self._connection = sqlite3.connect(self.file_path, timeout=60)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed INTEGER NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self._connection.commit()
+        total_size, last_accessed = self._connection.execute('SELECT COALESCE(SUM(size), 0), COALESCE(MAX(accessed), 0) FROM entries').fetchone()
+        self._total_size = total_size
+        self._clock = last_accessed
+
+    def __getstate__(self) -> dict[str, Any]:
+        # a pickled cache reopens the same file, so that worker processes can share it
+        return {'file_path': self.file_path, 'max_size': self.max_size}
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.file_path = state['file_path']
+        self.max_size = state['max_size']
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def __enter__(self) -> 'GlyphCache':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, key: bytes) -> bool:
+        return self._connection.execute('SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is not None
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, key: bytes) -> bytes | None:
+        row = self._connection.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._connection.execute('UPDATE entries SET accessed = ? WHERE key = ?', (self._tick(), key))
+        self._count_write()
+        return row[0]
+
+    def put(self, key: bytes, value: bytes):
+        row = self._connection.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self._total_size -= row[0]
+        self._connection.execute('INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)', (key, value, len(value), self._tick()))
+        self._total_size += len(value)
+        self._evict()
+        self._count_write()
+
+    def _count_write(self):
+        # commit in batches, so that the write lock is never held for a whole build when the file is shared
+        self._pending_writes += 1
+        if self._pending_writes >= _WRITES_PER_COMMIT:
+            self.flush()
+
+    def _evict(self):
+        while self._total_size > self.max_size:
+            row = self._connection.execute('SELECT key, size FROM entries ORDER BY accessed LIMIT 1').fetchone()
+            if row is None:
+                break
+            self._connection.execute('DELETE FROM entries WHERE key = ?', (row[0],))
+            self._total_size -= row[1]
+
+    @property
+    def total_size(self) -> int:
+        return self._total_size
+
+    def flush(self):
+        self._connection.commit()
+        self._pending_writes = 0
+
+    def clear(self):
+        self._connection.execute('DELETE FROM entries')
+        self._connection.commit()
+        self._total_size = 0
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
@@ -0,0 +1,48 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator
+
+
+class CodePointIndex:
+    """
+    The character mapping sorted once per build, shared by all backends.
+
+    `code_points` is ascending, with the glyph name of each at the same position,
+    and the first `basic_plane_count` of them are in the Basic Multilingual Plane.
+    """
+
+    code_points: array
+    glyph_names: list[str]
+    basic_plane_count: int
+
+    def __init__(self, character_mapping: dict[int, str]):
+        items = sorted(character_mapping.items())
+        self.code_points = array('I', [code_point for code_point, _ in items])
+        self.glyph_names = [glyph_name for _, glyph_name in items]
+        self.basic_plane_count = bisect_left(self.code_points, 0x10000)
+
+    def __len__(self) -> int:
+        return len(self.code_points)
+
+    def items(self, only_basic_plane: bool = False, default_char: int | None = None) -> Iterator[tuple[int, str]]:
+        """
+        The code points with their glyph names in ascending order. A `default_char` is mapped to '.notdef',
+        in place of its own glyph if it has one.
+        """
+        end = self.basic_plane_count if only_basic_plane else len(self.code_points)
+        if default_char is None or (only_basic_plane and default_char > 0xFFFF):
+            yield from zip(self.code_points[:end], self.glyph_names[:end])
+            return
+        position = bisect_left(self.code_points, default_char, 0, end)
+        yield from zip(self.code_points[:position], self.glyph_names[:position])
+        yield default_char, '.notdef'
+        if position < end and self.code_points[position] == default_char:
+            position += 1
+        yield from zip(self.code_points[position:end], self.glyph_names[position:end])
+
+    def to_dict(self) -> dict[int, str]:
+        """
+        The mapping in ascending order of code points.
+        """
+        return dict(zip(self.code_points, self.glyph_names))
+
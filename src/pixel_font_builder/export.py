@@ -0,0 +1,194 @@
+import pickle
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from enum import StrEnum
+from os import PathLike
+from typing import Any
+
+import pixel_font_builder
+from pixel_font_builder import opentype, bdf, pcf
+from pixel_font_builder.cache import GlyphCache
+from pixel_font_builder.cmap import CodePointIndex
+from pixel_font_builder.glyph import Glyph
+
+
+class OutputFormat(StrEnum):
+    OTF = 'otf'
+    OTF_WOFF = 'otf.woff'
+    OTF_WOFF2 = 'otf.woff2'
+    TTF = 'ttf'
+    TTF_WOFF = 'ttf.woff'
+    TTF_WOFF2 = 'ttf.woff2'
+    BDF = 'bdf'
+    PCF = 'pcf'
+
+    @property
+    def outlines_format(self) -> str:
+        return self.split('.')[0]
+
+    @property
+    def flavor(self) -> opentype.Flavor | None:
+        parts = self.split('.')
+        return opentype.Flavor(parts[1]) if len(parts) > 1 else None
+
+
+class _Snapshot:
+    context: 'pixel_font_builder.FontBuilder'
+    prepared_glyphs: tuple[list[str], Mapping[str, Glyph], CodePointIndex]
+    cache: GlyphCache | None
+
+    def __init__(
+            self,
+            context: 'pixel_font_builder.FontBuilder',
+            prepared_glyphs: tuple[list[str], Mapping[str, Glyph], CodePointIndex],
+            cache: GlyphCache | None,
+    ):
+        self.context = context
+        self.prepared_glyphs = prepared_glyphs
+        self.cache = cache
+
+
+# the snapshot of the worker process, sent once by the pool initializer instead of with every stage
+_worker_snapshot: _Snapshot | None = None
+
+
+def _init_worker(snapshot_data: bytes):
+    global _worker_snapshot
+    _worker_snapshot = pickle.loads(snapshot_data)
+
+
+def _compile_outlines(snapshot: _Snapshot, is_ttf: bool) -> tuple[bytes, set[str]]:
+    compiled_glyph_names = set()
+    builder = opentype.create_builder(snapshot.context, is_ttf, prepared_glyphs=snapshot.prepared_glyphs, cache=snapshot.cache, compiled_glyph_names=compiled_glyph_names)
+    with snapshot.context.profiler.phase('opentype.compile'):
+        return opentype.compile_builder(builder), compiled_glyph_names
+
+
+def _save_outlines(snapshot: _Snapshot, file_path: str | PathLike[str], flavor: opentype.Flavor | None, compiled_outlines: tuple[bytes, set[str]]):
+    data, _ = compiled_outlines
+    with snapshot.context.profiler.phase('opentype.save'):
+        opentype.save_compiled(data, file_path, flavor)
+
+
+def _save_bdf(snapshot: _Snapshot, file_path: str | PathLike[str]):
+    bdf.save_streaming(snapshot.context, file_path, snapshot.prepared_glyphs)
+
+
+def _save_pcf(snapshot: _Snapshot, file_path: str | PathLike[str]):
+    builder = pcf.create_builder(snapshot.context, snapshot.prepared_glyphs)
+    with snapshot.context.profiler.phase('pcf.save'):
+        builder.save(file_path)
+
+
+def _run_stage(function: Callable[..., Any], args: tuple) -> tuple[Any, float, dict[str, Any] | None]:
+    # runs in a worker process, the profiler report of the stage is sent back to be merged
+    profiler = _worker_snapshot.context.profiler
+    profiler.reset()
+    start_time = time.perf_counter()
+    result = function(_worker_snapshot, *args)
+    return result, time.perf_counter() - start_time, profiler.to_dict() if profiler.enabled else None
+
+
+class _Stage:
+    name: str
+    function: Callable[..., Any]
+    args: tuple
+    dependencies: list[str]
+
+    def __init__(
+            self,
+            name: str,
+            function: Callable[..., Any],
+            args: tuple = (),
+            dependencies: list[str] | None = None,
+    ):
+        self.name = name
+        self.function = function
+        self.args = args
+        if dependencies is None:
+            dependencies = []
+        self.dependencies = dependencies
+
+
+def _create_stages(outputs: dict[str | PathLike[str], OutputFormat]) -> list[_Stage]:
+    """
+    The stages in dependency order. Each stage gets the results of its dependencies appended to its arguments.
+    """
+    compile_stages = {}
+    save_stages = []
+    for file_path, output_format in outputs.items():
+        output_format = OutputFormat(output_format)
+        if output_format == OutputFormat.BDF:
+            save_stages.append(_Stage(f'save {file_path}', _save_bdf, (file_path,)))
+        elif output_format == OutputFormat.PCF:
+            save_stages.append(_Stage(f'save {file_path}', _save_pcf, (file_path,)))
+        else:
+            compile_stage_name = f'compile {output_format.outlines_format}'
+            if compile_stage_name not in compile_stages:
+                compile_stages[compile_stage_name] = _Stage(compile_stage_name, _compile_outlines, (output_format.outlines_format == 'ttf',))
+            save_stages.append(_Stage(f'save {file_path}', _save_outlines, (file_path, output_format.flavor), [compile_stage_name]))
+    return [*compile_stages.values(), *save_stages]
+
+
+def _run_serially(snapshot: _Snapshot, stages: list[_Stage]) -> tuple[dict[str, Any], dict[str, float]]:
+    results = {}
+    timings = {}
+    for stage in stages:
+        args = stage.args + tuple(results[dependency] for dependency in stage.dependencies)
+        start_time = time.perf_counter()
+        results[stage.name] = stage.function(snapshot, *args)
+        timings[stage.name] = time.perf_counter() - start_time
+    return results, timings
+
+
+def _run_in_parallel(snapshot: _Snapshot, stages: list[_Stage], workers: int) -> tuple[dict[str, Any], dict[str, float]]:
+    results = {}
+    timings = {}
+    pending_stages = list(stages)
+    running_futures: dict[Future, _Stage] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pickle.dumps(snapshot),)) as executor:
+        while len(pending_stages) > 0 or len(running_futures) > 0:
+            for stage in list(pending_stages):
+                if all(dependency in results for dependency in stage.dependencies):
+                    args = stage.args + tuple(results[dependency] for dependency in stage.dependencies)
+                    running_futures[executor.submit(_run_stage, stage.function, args)] = stage
+                    pending_stages.remove(stage)
+            done_futures, _ = wait(running_futures, return_when=FIRST_COMPLETED)
+            for future in done_futures:
+                stage = running_futures.pop(future)
+                results[stage.name], timings[stage.name], profiler_report = future.result()
+                if profiler_report is not None:
+                    snapshot.context.profiler.merge(profiler_report)
+    return results, timings
+
+
+def export(
+        context: 'pixel_font_builder.FontBuilder',
+        outputs: dict[str | PathLike[str], OutputFormat],
+        prepared_glyphs: tuple[list[str], Mapping[str, Glyph], CodePointIndex],
+        cache: GlyphCache | None = None,
+        workers: int = 1,
+) -> tuple[dict[str, float], set[str] | None]:
+    """
+    Save all outputs from one snapshot of the prepared glyphs. Return the seconds spent in every stage,
+    and the names of the glyphs compiled by any 'compile' stage instead of served by a cache, or None without OTF and TTF outputs.
+
+    The OTF and TTF tables are compiled once by a 'compile' stage, which every flavor of them depends on.
+    With more than one worker, the stages run concurrently in worker processes as soon as their dependencies are done.
+    """
+    snapshot = _Snapshot(context, prepared_glyphs, cache)
+    stages = _create_stages(outputs)
+    if workers > 1 and len(stages) > 1:
+        if cache is not None:
+            cache.flush()
+        results, timings = _run_in_parallel(snapshot, stages, workers)
+    else:
+        results, timings = _run_serially(snapshot, stages)
+    compiled_glyph_names = None
+    for stage in stages:
+        if stage.function is _compile_outlines:
+            if compiled_glyph_names is None:
+                compiled_glyph_names = set()
+            compiled_glyph_names.update(results[stage.name][1])
+    return timings, compiled_glyph_names
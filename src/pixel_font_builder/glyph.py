@@ -1,5 +1,87 @@
+import functools
+from collections.abc import Sequence
+from typing import Any
+
+
+@functools.cache
+def create_alpha_table(alpha_threshold: int) -> bytes:
+    """
+    A `bytes.translate` table from 8-bit alpha to the characters '0' and '1', lit above `alpha_threshold`.
+    """
+    return bytes(ord('1') if alpha > alpha_threshold else ord('0') for alpha in range(256))
+
+
+def _pack_bitmap(bitmap: list[list[int]]) -> tuple[bytes, int, int]:
+    height = len(bitmap)
+    width = len(bitmap[0]) if height > 0 else 0
+    row_size = (width + 7) // 8
+    data = bytearray()
+    for bitmap_row in bitmap:
+        mask = 0
+        for alpha in bitmap_row[:width]:
+            mask = (mask << 1) | (1 if alpha != 0 else 0)
+        mask <<= row_size * 8 - min(len(bitmap_row), width)
+        data += mask.to_bytes(row_size, 'big')
+    return bytes(data), width, height
+
+
+class _LazyBitmap(Sequence[list[int]]):
+    def __init__(self, bitmap_row_masks: list[int], width: int):
+        self._bitmap_row_masks = bitmap_row_masks
+        self._width = width
+
+    def __len__(self) -> int:
+        return len(self._bitmap_row_masks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        mask = self._bitmap_row_masks[index]
+        return [(mask >> (self._width - 1 - x)) & 1 for x in range(self._width)]
+
+
+class _ReadOnlyList(list):
+    """
+    A list that raises on any in-place change.
+    """
+
+    def _raise_read_only(self, *args, **kwargs):
+        raise TypeError("the bitmap of a glyph is read-only, assign a new bitmap to 'Glyph.bitmap' instead")
+
+    __setitem__ = _raise_read_only
+    __delitem__ = _raise_read_only
+    __iadd__ = _raise_read_only
+    __imul__ = _raise_read_only
+    append = _raise_read_only
+    extend = _raise_read_only
+    insert = _raise_read_only
+    pop = _raise_read_only
+    remove = _raise_read_only
+    clear = _raise_read_only
+    sort = _raise_read_only
+    reverse = _raise_read_only
+
 
 class Glyph:
+    """
+    The bitmap is stored packed: row-major, one bit per pixel, most significant bit first, every row padded to a byte.
+    """
+
+    __slots__ = (
+        'name',
+        'horizontal_origin_x',
+        'horizontal_origin_y',
+        'advance_width',
+        'vertical_origin_x',
+        'vertical_origin_y',
+        'advance_height',
+        '_width',
+        '_height',
+        '_packed_bitmap',
+        '_revision',
+        '_caches',
+    )
+
     name: str
     horizontal_origin_x: int
     horizontal_origin_y: int
@@ -7,7 +89,6 @@ class Glyph:
     vertical_origin_x: int
     vertical_origin_y: int
     advance_height: int
-    bitmap: list[list[int]]
 
     def __init__(
             self,
@@ -18,6 +99,8 @@ class Glyph:
             advance_height: int = 0,
             bitmap: list[list[int]] | None = None,
     ):
+        self._revision = 0
+        self._caches = {}
         self.name = name
         self.horizontal_origin_x, self.horizontal_origin_y = horizontal_origin
         self.advance_width = advance_width
@@ -27,6 +110,40 @@ class Glyph:
             bitmap = []
         self.bitmap = bitmap
 
+    def __setattr__(self, name: str, value: Any):
+        # Bump the revision on every public field assignment, so that output caches can be invalidated in O(1).
+        # In-place edits of the bitmap rows are not tracked, reassign the bitmap instead.
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self._touch()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the caches are derived data, and may hold objects that can not be pickled
+        return {name: getattr(self, name) for name in Glyph.__slots__ if name != '_caches'}
+
+    def __setstate__(self, state: dict[str, Any]):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_caches', {})
+
+    def _touch(self):
+        self._revision += 1
+        self._caches = {}
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    def get_cache(self, namespace: str) -> dict[Any, Any]:
+        """
+        A scratch dict for data derived from this glyph, dropped whenever the glyph is modified.
+        """
+        cache = self._caches.get(namespace)
+        if cache is None:
+            cache = {}
+            self._caches[namespace] = cache
+        return cache
+
     @property
     def horizontal_origin(self) -> tuple[int, int]:
         return self.horizontal_origin_x, self.horizontal_origin_y
@@ -43,37 +160,100 @@ class Glyph:
     def vertical_origin(self, value: tuple[int, int]):
         self.vertical_origin_x, self.vertical_origin_y = value
 
+    @property
+    def bitmap(self) -> list[list[int]]:
+        """
+        A compatibility view expanded from the packed bitmap, cached until the glyph is modified.
+
+        The view is read-only, in-place edits like `glyph.bitmap[y][x] = 1` raise `TypeError`,
+        assign a new bitmap instead. Copy the rows with `[list(row) for row in glyph.bitmap]` to edit them.
+        """
+        cache = self.get_cache('glyph')
+        bitmap = cache.get('bitmap')
+        if bitmap is None:
+            bitmap = _ReadOnlyList(_ReadOnlyList((mask >> (self._width - 1 - x)) & 1 for x in range(self._width)) for mask in self.bitmap_row_masks)
+            cache['bitmap'] = bitmap
+        return bitmap
+
+    @bitmap.setter
+    def bitmap(self, value: list[list[int]]):
+        self._packed_bitmap, self._width, self._height = _pack_bitmap(value)
+
+    @property
+    def lazy_bitmap(self) -> Sequence[list[int]]:
+        """
+        Like `bitmap`, but expands one row at a time on access.
+        """
+        return _LazyBitmap(self.bitmap_row_masks, self._width)
+
+    @property
+    def packed_bitmap(self) -> bytes:
+        return self._packed_bitmap
+
+    def set_packed_bitmap(self, packed_bitmap: bytes, width: int, height: int):
+        if len(packed_bitmap) != (width + 7) // 8 * height:
+            raise ValueError(f'packed bitmap size mismatch: {len(packed_bitmap)} bytes for {width}x{height}')
+        self._packed_bitmap = bytes(packed_bitmap)
+        self._width = width
+        self._height = height
+        self._touch()
+
+    @property
+    def bitmap_row_size(self) -> int:
+        return (self._width + 7) // 8
+
+    @property
+    def bitmap_row_masks(self) -> list[int]:
+        """
+        One int per row, pixel `x` is the bit `width - 1 - x`.
+        """
+        row_size = self.bitmap_row_size
+        if row_size == 0:
+            return [0] * self._height
+        padding = row_size * 8 - self._width
+        data = self._packed_bitmap
+        return [int.from_bytes(data[i:i + row_size], 'big') >> padding for i in range(0, row_size * self._height, row_size)]
+
     @property
     def width(self) -> int:
-        if len(self.bitmap) > 0:
-            return len(self.bitmap[0])
-        else:
-            return 0
+        return self._width
 
     @property
     def height(self) -> int:
-        return len(self.bitmap)
+        return self._height
 
     @property
     def dimensions(self) -> tuple[int, int]:
         return self.width, self.height
 
+    def calculate_bitmap_ink_box(self) -> tuple[int, int, int, int] | None:
+        """
+        The box of the lit pixels as `(left, top, right, bottom)`, right and bottom exclusive, or None if blank.
+        Computed in one pass over the row masks and cached until the glyph is modified.
+        """
+        cache = self.get_cache('glyph')
+        if 'ink_box' not in cache:
+            columns_mask = 0
+            top = None
+            bottom = None
+            for y, mask in enumerate(self.bitmap_row_masks):
+                if mask != 0:
+                    columns_mask |= mask
+                    if top is None:
+                        top = y
+                    bottom = y + 1
+            if columns_mask == 0:
+                cache['ink_box'] = None
+            else:
+                left = self.width - columns_mask.bit_length()
+                right = self.width - ((columns_mask & -columns_mask).bit_length() - 1)
+                cache['ink_box'] = left, top, right, bottom
+        return cache['ink_box']
+
     def calculate_bitmap_left_padding(self) -> int:
-        padding = 0
-        for i in range(self.width):
-            if any(bitmap_row[i] for bitmap_row in self.bitmap) != 0:
-                break
-            padding += 1
-        if padding == self.width:
-            padding = 0
-        return padding
+        ink_box = self.calculate_bitmap_ink_box()
+        return 0 if ink_box is None else ink_box[0]
 
     def calculate_bitmap_top_padding(self) -> int:
-        padding = 0
-        for bitmap_row in self.bitmap:
-            if any(bitmap_row) != 0:
-                break
-            padding += 1
-        if padding == self.height:
-            padding = 0
-        return padding
+        ink_box = self.calculate_bitmap_ink_box()
+        return 0 if ink_box is None else ink_box[1]
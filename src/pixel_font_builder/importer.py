@@ -0,0 +1,163 @@
+import functools
+import json
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+
+import png
+
+from pixel_font_builder.glyph import create_alpha_table
+
+_INDEX_VERSION = 1
+
+
+class ImportedBitmap:
+    """
+    A bitmap loaded from an image file, packed in the same layout as `Glyph.packed_bitmap`.
+    """
+
+    file_path: Path
+    packed_bitmap: bytes
+    width: int
+    height: int
+
+    def __init__(
+            self,
+            file_path: Path,
+            packed_bitmap: bytes,
+            width: int,
+            height: int,
+    ):
+        self.file_path = file_path
+        self.packed_bitmap = packed_bitmap
+        self.width = width
+        self.height = height
+
+    @property
+    def bitmap(self) -> list[list[int]]:
+        row_size = (self.width + 7) // 8
+        bitmap = []
+        for i in range(0, row_size * self.height, row_size):
+            mask = int.from_bytes(self.packed_bitmap[i:i + row_size], 'big')
+            bitmap.append([(mask >> (row_size * 8 - 1 - x)) & 1 for x in range(self.width)])
+        return bitmap
+
+
+def load_png(file_path: str | PathLike[str], alpha_threshold: int = 127) -> ImportedBitmap:
+    """
+    Decode a PNG of any color type, a pixel is lit if its alpha is greater than `alpha_threshold`.
+    """
+    width, height, pixels, info = png.Reader(filename=file_path).read()
+    if not info['alpha'] or info['bitdepth'] != 8:
+        width, height, pixels, info = png.Reader(filename=file_path).asRGBA8()
+    planes = info['planes']
+    row_size = (width + 7) // 8
+    padding = row_size * 8 - width
+    alpha_table = create_alpha_table(alpha_threshold)
+    data = bytearray()
+    for pixels_row in pixels:
+        if width == 0:
+            continue
+        # the alpha bytes of the whole row become a string of '0' and '1', then one int
+        bits = bytes(pixels_row[planes - 1::planes]).translate(alpha_table)
+        data += (int(bits, 2) << padding).to_bytes(row_size, 'big')
+    return ImportedBitmap(Path(file_path), bytes(data), width, height)
+
+
+class PngImporter:
+    """
+    Loads glyph PNGs into packed bitmaps, decoding them in worker processes if `workers` is more than one.
+
+    With an index file, the bitmaps are stored along with the mtime and the size of their files,
+    and files unchanged since the last import are not decoded again.
+    """
+
+    index_file_path: Path | None
+    alpha_threshold: int
+    workers: int
+    decoded_file_paths: list[Path]
+    reused_file_paths: list[Path]
+
+    def __init__(
+            self,
+            index_file_path: str | PathLike[str] | None = None,
+            alpha_threshold: int = 127,
+            workers: int = 1,
+    ):
+        self.index_file_path = None if index_file_path is None else Path(index_file_path)
+        self.alpha_threshold = alpha_threshold
+        self.workers = workers
+        self.decoded_file_paths = []
+        self.reused_file_paths = []
+
+    def _load_index(self) -> dict[str, dict]:
+        if self.index_file_path is None or not self.index_file_path.is_file():
+            return {}
+        index = json.loads(self.index_file_path.read_text('utf-8'))
+        if index.get('version') != _INDEX_VERSION or index.get('alpha_threshold') != self.alpha_threshold:
+            return {}
+        return index['files']
+
+    def _save_index(self, entries: dict[str, dict]):
+        self.index_file_path.parent.mkdir(parents=True, exist_ok=True)
+        index = {
+            'version': _INDEX_VERSION,
+            'alpha_threshold': self.alpha_threshold,
+            'files': entries,
+        }
+        temp_file_path = self.index_file_path.with_name(f'{self.index_file_path.name}.tmp')
+        temp_file_path.write_text(json.dumps(index), 'utf-8')
+        temp_file_path.replace(self.index_file_path)
+
+    def load_files(self, file_paths: Iterable[str | PathLike[str]]) -> dict[Path, ImportedBitmap]:
+        """
+        Returns the bitmaps in the order of `file_paths`.
+        The index is rewritten with the given files only, entries of other files are dropped.
+        """
+        file_paths = [Path(file_path) for file_path in file_paths]
+        old_entries = self._load_index()
+        new_entries = {}
+        bitmaps = {}
+        self.decoded_file_paths = []
+        self.reused_file_paths = []
+        for file_path in file_paths:
+            key = file_path.as_posix()
+            stat = os.stat(file_path)
+            entry = old_entries.get(key)
+            if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                bitmaps[file_path] = ImportedBitmap(file_path, bytes.fromhex(entry['bitmap']), entry['width'], entry['height'])
+                self.reused_file_paths.append(file_path)
+            else:
+                bitmaps[file_path] = None
+                self.decoded_file_paths.append(file_path)
+            new_entries[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+        decode = functools.partial(load_png, alpha_threshold=self.alpha_threshold)
+        if self.workers > 1 and len(self.decoded_file_paths) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                chunk_size = max(1, len(self.decoded_file_paths) // (self.workers * 4))
+                decoded_bitmaps = list(executor.map(decode, self.decoded_file_paths, chunksize=chunk_size))
+        else:
+            decoded_bitmaps = [decode(file_path) for file_path in self.decoded_file_paths]
+        for bitmap in decoded_bitmaps:
+            bitmaps[bitmap.file_path] = bitmap
+
+        if self.index_file_path is not None:
+            for file_path, bitmap in bitmaps.items():
+                new_entries[file_path.as_posix()].update({
+                    'width': bitmap.width,
+                    'height': bitmap.height,
+                    'bitmap': bitmap.packed_bitmap.hex(),
+                })
+            self._save_index(new_entries)
+        return bitmaps
+
+    def load_dir(self, dir_path: str | PathLike[str], recursive: bool = False) -> dict[Path, ImportedBitmap]:
+        """
+        Returns the bitmaps of all '.png' files in the directory, ordered by path.
+        """
+        dir_path = Path(dir_path)
+        file_paths = dir_path.rglob('*.png') if recursive else dir_path.glob('*.png')
+        return self.load_files(sorted(file_path for file_path in file_paths if file_path.is_file()))
@@ -0,0 +1,123 @@
+import hashlib
+import json
+from collections.abc import Iterable
+from os import PathLike
+from pathlib import Path
+
+from pixel_font_builder.cache import GlyphCache
+from pixel_font_builder.glyph import Glyph
+
+
+def calculate_glyph_hash(glyph: Glyph) -> str:
+    """
+    A hash of everything that affects the compiled glyph: the bitmap, the origins and the advances.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f'{glyph.dimensions}#{glyph.horizontal_origin}#{glyph.advance_width}#{glyph.vertical_origin}#{glyph.advance_height}'.encode())
+    hasher.update(glyph.packed_bitmap)
+    return hasher.hexdigest()
+
+
+class BuildReport:
+    reused_glyph_names: list[str]
+    recompiled_glyph_names: list[str]
+    removed_glyph_names: list[str]
+    merged_glyph_names: dict[str, str]
+    stage_timings: dict[str, float]
+
+    def __init__(
+            self,
+            reused_glyph_names: list[str] | None = None,
+            recompiled_glyph_names: list[str] | None = None,
+            removed_glyph_names: list[str] | None = None,
+            merged_glyph_names: dict[str, str] | None = None,
+            stage_timings: dict[str, float] | None = None,
+    ):
+        if reused_glyph_names is None:
+            reused_glyph_names = []
+        self.reused_glyph_names = reused_glyph_names
+        if recompiled_glyph_names is None:
+            recompiled_glyph_names = []
+        self.recompiled_glyph_names = recompiled_glyph_names
+        if removed_glyph_names is None:
+            removed_glyph_names = []
+        self.removed_glyph_names = removed_glyph_names
+        if merged_glyph_names is None:
+            merged_glyph_names = {}
+        self.merged_glyph_names = merged_glyph_names
+        if stage_timings is None:
+            stage_timings = {}
+        self.stage_timings = stage_timings
+
+    @property
+    def reused_count(self) -> int:
+        return len(self.reused_glyph_names)
+
+    @property
+    def recompiled_count(self) -> int:
+        return len(self.recompiled_glyph_names)
+
+    def __str__(self) -> str:
+        lines = [f'{self.reused_count} glyphs reused, {self.recompiled_count} glyphs recompiled, {len(self.removed_glyph_names)} glyphs removed']
+        if len(self.merged_glyph_names) > 0:
+            lines.append(f'{len(self.merged_glyph_names)} duplicate glyphs merged')
+        for stage_name, seconds in self.stage_timings.items():
+            lines.append(f'{stage_name}: {seconds:.3f}s')
+        return '\n'.join(lines)
+
+
+class BuildManifest:
+    """
+    The state of the last build, kept in a directory: the glyph names in 'manifest.json',
+    and the compiled outlines in a `GlyphCache` at 'glyphs.sqlite'.
+
+    Pass it to `FontBuilder.save_all` to recompile only the glyphs changed since the last build.
+    The cache is the change detector: its keys are the glyph content and the outline config,
+    so a glyph is reused exactly when an output finds its outlines in the cache.
+    """
+
+    dir_path: Path
+    glyph_names: list[str]
+    cache: GlyphCache
+
+    def __init__(
+            self,
+            dir_path: str | PathLike[str],
+            max_cache_size: int = 256 * 1024 * 1024,
+    ):
+        self.dir_path = Path(dir_path)
+        self.dir_path.mkdir(parents=True, exist_ok=True)
+        file_path = self.dir_path.joinpath('manifest.json')
+        if file_path.is_file():
+            # a list of names, or a mapping keyed by the names in older manifests
+            self.glyph_names = list(json.loads(file_path.read_text('utf-8'))['glyphs'])
+        else:
+            self.glyph_names = []
+        self.cache = GlyphCache(self.dir_path.joinpath('glyphs.sqlite'), max_cache_size)
+
+    def __enter__(self) -> 'BuildManifest':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def compare(self, glyphs: Iterable[Glyph]) -> BuildReport:
+        """
+        A report of the glyphs removed since the last build. The reused and recompiled glyphs are only known
+        after the build, from what the cache actually served.
+        """
+        report = BuildReport()
+        glyph_names = {glyph.name for glyph in glyphs}
+        report.removed_glyph_names.extend(glyph_name for glyph_name in self.glyph_names if glyph_name not in glyph_names)
+        return report
+
+    def update(self, glyphs: Iterable[Glyph]):
+        self.glyph_names = [glyph.name for glyph in glyphs]
+
+    def save(self):
+        self.cache.flush()
+        file_path = self.dir_path.joinpath('manifest.json')
+        file_path.write_text(json.dumps({'glyphs': self.glyph_names}, indent=2), 'utf-8')
+
+    def close(self):
+        self.cache.close()
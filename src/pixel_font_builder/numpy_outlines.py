@@ -0,0 +1,117 @@
+import numpy as np
+
+# 方向：右、下、左、上，左上角原点坐标系中依次右转
+_DIRECTION_DX = np.array([1, 0, -1, 0])
+_DIRECTION_DY = np.array([0, 1, 0, -1])
+
+# 每批顶点数的上限，限制顶点出边表的内存
+_MAX_BATCH_VERTICES = 1 << 20
+
+
+def unpack_bitmaps(packed_bitmaps: list[bytes], width: int, height: int) -> np.ndarray:
+    """
+    将相同尺寸的打包位图展开为 `(n, height, width)` 的布尔数组
+    """
+    row_size = (width + 7) // 8
+    data = np.frombuffer(b''.join(packed_bitmaps), dtype=np.uint8).reshape(len(packed_bitmaps), height, row_size)
+    return np.unpackbits(data, axis=2)[:, :, :width].astype(bool)
+
+
+def _create_outlines_in_batch(bitmaps: np.ndarray, px_to_units: int) -> list[list[list[tuple[int, int]]]]:
+    count, height, width = bitmaps.shape
+    padded = np.zeros((count, height + 2, width + 2), dtype=bool)
+    padded[:, 1:-1, 1:-1] = bitmaps
+
+    # 用数组差分求出四个方向的边界边，顺时针方向，与 `_create_outlines_by_tracing` 一致
+    # 每条边记录所属字形、起点和方向
+    edge_parts = []
+    for direction, neighbors, start_dx, start_dy in (
+            (0, padded[:, :-2, 1:-1], 0, 0),  # 上边，向右
+            (1, padded[:, 1:-1, 2:], 1, 0),  # 右边，向下
+            (2, padded[:, 2:, 1:-1], 1, 1),  # 下边，向左
+            (3, padded[:, 1:-1, :-2], 0, 1),  # 左边，向上
+    ):
+        g, y, x = np.nonzero(bitmaps & ~neighbors)
+        edge_parts.append((g, x + start_dx, y + start_dy, np.full(len(g), direction)))
+    g = np.concatenate([part[0] for part in edge_parts])
+    x = np.concatenate([part[1] for part in edge_parts])
+    y = np.concatenate([part[2] for part in edge_parts])
+    directions = np.concatenate([part[3] for part in edge_parts])
+    edges_count = len(g)
+    outlines_list = [[] for _ in range(count)]
+    if edges_count == 0:
+        return outlines_list
+
+    # 顶点出边表，每个顶点每个方向至多一条出边
+    vertex_stride_y = width + 1
+    vertex_stride_g = (height + 1) * vertex_stride_y
+    start_vertices = g * vertex_stride_g + y * vertex_stride_y + x
+    end_vertices = start_vertices + _DIRECTION_DX[directions] + _DIRECTION_DY[directions] * vertex_stride_y
+    out_edges = np.full((count * vertex_stride_g, 4), -1, dtype=np.int32)
+    edge_indices = np.arange(edges_count, dtype=np.int32)
+    out_edges[start_vertices, directions] = edge_indices
+
+    # 下一条边：优先右转，即对角相接的点只绕当前像素，其次直行，最后左转
+    next_edges = out_edges[end_vertices, (directions + 1) % 4]
+    next_edges = np.where(next_edges >= 0, next_edges, out_edges[end_vertices, directions])
+    next_edges = np.where(next_edges >= 0, next_edges, out_edges[end_vertices, (directions + 3) % 4])
+    previous_edges = np.empty_like(next_edges)
+    previous_edges[next_edges] = edge_indices
+
+    # 指针倍增，以环内最小的边序号标记每个轮廓
+    labels = edge_indices.copy()
+    jumps = next_edges.copy()
+    while True:
+        new_labels = np.minimum(labels, labels[jumps])
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        jumps = jumps[jumps]
+
+    # 在标记边之前断开每个环，再用指针倍增求出每条边到断点的距离，即在轮廓中的逆序位置
+    is_tail = np.zeros(edges_count, dtype=bool)
+    is_tail[previous_edges[labels == edge_indices]] = True
+    jumps = np.where(is_tail, edge_indices, next_edges)
+    distances = (~is_tail).astype(np.int64)
+    while True:
+        next_jumps = jumps[jumps]
+        distances = distances + distances[jumps]
+        if np.array_equal(next_jumps, jumps):
+            break
+        jumps = next_jumps
+
+    # 按轮廓排列，轮廓按标记边的序号先后，轮廓内从标记边开始，直接算出每条边的位置而不排序
+    contour_sizes = np.bincount(labels, minlength=edges_count)
+    contour_offsets = np.cumsum(contour_sizes) - contour_sizes
+    order = np.empty_like(edge_indices)
+    order[contour_offsets[labels] + contour_sizes[labels] - 1 - distances] = edge_indices
+    # 只保留转角处的起点，即去掉共线的点
+    order = order[directions[order] != directions[previous_edges[order]]]
+    points = list(zip((x[order] * px_to_units).tolist(), (y[order] * px_to_units).tolist()))
+    ordered_labels = labels[order]
+    starts = np.flatnonzero(np.concatenate(([True], ordered_labels[1:] != ordered_labels[:-1])))
+    ends = np.append(starts[1:], len(order))
+    for glyph_index, start, end in zip(g[ordered_labels[starts]].tolist(), starts.tolist(), ends.tolist()):
+        outlines_list[glyph_index].append(points[start:end])
+    return outlines_list
+
+
+def create_outlines_in_batches(bitmaps: np.ndarray, px_to_units: int) -> list[list[list[tuple[int, int]]]]:
+    """
+    将 `(n, height, width)` 的位图数组转换为每个字形的轮廓数据，左上角原点坐标系
+    与 `_create_outlines_by_tracing` 生成相同的多边形和绘制方向，但起点和轮廓顺序可能不同
+    """
+    count, height, width = bitmaps.shape
+    batch_size = max(1, _MAX_BATCH_VERTICES // ((height + 1) * (width + 1)))
+    outlines_list = []
+    for i in range(0, count, batch_size):
+        outlines_list.extend(_create_outlines_in_batch(bitmaps[i:i + batch_size], px_to_units))
+    return outlines_list
+
+
+def create_outlines(bitmap_row_masks: list[int], width: int, px_to_units: int) -> list[list[tuple[int, int]]]:
+    height = len(bitmap_row_masks)
+    row_size = (width + 7) // 8
+    padding = row_size * 8 - width
+    packed_bitmap = b''.join((mask << padding).to_bytes(row_size, 'big') for mask in bitmap_row_masks)
+    return create_outlines_in_batches(unpack_bitmaps([packed_bitmap], width, height), px_to_units)[0]
@@ -1,23 +1,36 @@
+import functools
+import hashlib
+from array import array
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from enum import StrEnum
+from io import BytesIO
 from os import PathLike
 
+from fontTools.cffLib import SubrsIndex
 from fontTools.fontBuilder import FontBuilder
 from fontTools.misc import timeTools
-from fontTools.misc.psCharStrings import T2CharString as OTFGlyph
+from fontTools.misc.roundTools import otRound
+from fontTools.misc.psCharStrings import T2CharString as OTFGlyph, calcSubrBias
 from fontTools.pens.t2CharStringPen import T2CharStringPen as OTFGlyphPen
 from fontTools.pens.ttGlyphPen import TTGlyphPen as TTFGlyphPen
-from fontTools.ttLib import TTCollection
+from fontTools.pens.recordingPen import DecomposingRecordingPen
+from fontTools.ttLib import TTCollection, TTFont
+from fontTools.ttLib.tables import ttProgram
 # noinspection PyProtectedMember
-from fontTools.ttLib.tables._g_l_y_f import Glyph as TTFGlyph
+from fontTools.ttLib.tables._g_l_y_f import Glyph as TTFGlyph, GlyphComponent, GlyphCoordinates, ROUND_XY_TO_GRID
 
 import pixel_font_builder
+from pixel_font_builder.cache import GlyphCache
+from pixel_font_builder.cmap import CodePointIndex
 from pixel_font_builder.glyph import Glyph
 from pixel_font_builder.meta import WeightName, MetaInfo
+from pixel_font_builder.profiling import Profiler
+from pixel_font_builder.provider import GlyphProvider, ProvidedGlyphs
 
-_CACHE_NAME_TAG = '_opentype_cache_tag'
-_CACHE_NAME_OUTLINES = '_opentype_cache_outlines'
-_CACHE_NAME_OTF_GLYPH = '_opentype_cache_otf_glyph'
-_CACHE_NAME_TTF_GLYPH = '_opentype_cache_ttf_glyph'
+_CACHE_NAME = 'opentype'
+_DOT_GLYPH_NAME = '.dot'
+_DISABLED_PROFILER = Profiler(enabled=False)
 
 
 class FeatureFile:
@@ -34,19 +47,49 @@ class FeatureFile:
         self.file_path = file_path
 
 
+class OutlineEngine(StrEnum):
+    # the engines draw the same polygons, but not in the same point order, so the output bytes depend on the engine
+    LEGACY = 'legacy'
+    TRACE = 'trace'
+    # vectorized over whole batches of glyphs, needs 'numpy', otherwise the same as `TRACE`
+    NUMPY = 'numpy'
+
+
+class DotMode(StrEnum):
+    SEPARATE = 'separate'
+    TEMPLATE = 'template'
+    MERGED = 'merged'
+    COMPOSITE = 'composite'
+
+
 class Config:
     px_to_units: int
     feature_files: list[FeatureFile]
+    outline_engine: OutlineEngine
+    dot_mode: DotMode
+    workers: int
+    cache: GlyphCache | None
+    subroutinize: bool
 
     def __init__(
             self,
             px_to_units: int = 100,
             feature_files: list[FeatureFile] | None = None,
+            outline_engine: OutlineEngine = OutlineEngine.TRACE,
+            dot_mode: DotMode = DotMode.SEPARATE,
+            workers: int = 1,
+            cache: GlyphCache | None = None,
+            subroutinize: bool = False,
     ):
         self.px_to_units = px_to_units
         if feature_files is None:
             feature_files = []
         self.feature_files = feature_files
+        self.outline_engine = outline_engine
+        self.dot_mode = dot_mode
+        self.workers = workers
+        self.cache = cache
+        self.subroutinize = subroutinize
 
 
 class Flavor(StrEnum):
@@ -206,6 +249,144 @@ def _create_outlines(bitmap: list[list[int]], px_to_units: int) -> list[list[tup
     return outlines
 
 
+def _iter_mask_bits(mask: int):
+    # 从高位到低位，即从左到右
+    while mask != 0:
+        bit = mask.bit_length() - 1
+        yield bit
+        mask ^= 1 << bit
+
+
+def _create_outlines_by_tracing(bitmap_row_masks: list[int], width: int, px_to_units: int) -> list[list[tuple[int, int]]]:
+    """
+    将字形数据转换为轮廓数据，左上角原点坐标系
+    与 `_create_outlines` 生成相同的多边形和绘制方向，但只需线性时间：
+    先用并查集按行程标记四连通分量，再沿边界有向边逐条行走
+    """
+    height = len(bitmap_row_masks)
+
+    # 并查集标记相邻像素分组，以每行连续像素（行程）为单位
+    parents = []
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    row_runs = []
+    last_runs = []
+    for mask in bitmap_row_masks:
+        runs = []
+        while mask != 0:
+            start_bit = mask.bit_length() - 1
+            end_bit = (~mask & ((1 << start_bit) - 1)).bit_length()
+            run = width - 1 - start_bit, width - end_bit, len(parents)
+            parents.append(run[2])
+            runs.append(run)
+            mask &= (1 << end_bit) - 1
+        # 与上一行有重叠的行程相连
+        i = 0
+        for x0, x1, index in runs:
+            while i < len(last_runs) and last_runs[i][1] <= x0:
+                i += 1
+            j = i
+            while j < len(last_runs) and last_runs[j][0] < x1:
+                root, root_up = find(index), find(last_runs[j][2])
+                if root != root_up:
+                    parents[root] = root_up
+                j += 1
+        row_runs.append(runs)
+        last_runs = runs
+
+    # 按分组收集有向边界边（起点 -> 终点列表），顺时针方向，与 `_create_outlines` 一致
+    group_to_edges: dict[int, dict[tuple[int, int], list[tuple[int, int]]]] = {}
+    for y, mask in enumerate(bitmap_row_masks):
+        up_mask = bitmap_row_masks[y - 1] if y > 0 else 0
+        down_mask = bitmap_row_masks[y + 1] if y < height - 1 else 0
+        left_mask = mask & ~(mask >> 1)
+        right_mask = mask & ~(mask << 1)
+        top_mask = mask & ~up_mask
+        bottom_mask = mask & ~down_mask
+        for x0, x1, index in row_runs[y]:
+            edges = group_to_edges.setdefault(find(index), {})
+            for x in range(x0, x1):
+                bit = 1 << (width - 1 - x)
+                if left_mask & bit:  # 左
+                    edges.setdefault((x, y + 1), []).append((x, y))
+                if right_mask & bit:  # 右
+                    edges.setdefault((x + 1, y), []).append((x + 1, y + 1))
+                if top_mask & bit:  # 上
+                    edges.setdefault((x, y), []).append((x + 1, y))
+                if bottom_mask & bit:  # 下
+                    edges.setdefault((x + 1, y + 1), []).append((x, y + 1))
+
+    # 沿边行走生成轮廓，对角相接的点（一进二出）总是右转，即只绕当前像素
+    outlines = []
+    for edges in group_to_edges.values():
+        while len(edges) > 0:
+            start_point = next(iter(edges))
+            first_point = edges[start_point].pop()
+            if len(edges[start_point]) == 0:
+                del edges[start_point]
+            points = [start_point]
+            last_point, point = start_point, first_point
+            while True:
+                dx, dy = point[0] - last_point[0], point[1] - last_point[1]
+                next_point = point[0] - dy, point[1] + dx
+                if point == start_point and (start_point not in edges or next_point == first_point):
+                    break
+                points.append(point)
+                targets = edges[point]
+                if len(targets) == 1:
+                    next_point = targets.pop()
+                    del edges[point]
+                else:
+                    targets.remove(next_point)
+                last_point, point = point, next_point
+
+            # 去掉共线的点
+            outline = []
+            for i, (x, y) in enumerate(points):
+                xl, yl = points[i - 1]
+                xr, yr = points[(i + 1) % len(points)]
+                if (x == xl and x == xr) or (y == yl and y == yr):
+                    continue
+                outline.append((x * px_to_units, y * px_to_units))
+            outlines.append(outline)
+    return outlines
+
+
+def _expand_bitmap_row_masks(bitmap_row_masks: list[int], width: int) -> list[list[int]]:
+    return [[(mask >> (width - 1 - x)) & 1 for x in range(width)] for mask in bitmap_row_masks]
+
+
+def _create_outlines_with_engine(bitmap_row_masks: list[int], width: int, px_to_units: int, outline_engine: OutlineEngine) -> list[list[tuple[int, int]]]:
+    if outline_engine == OutlineEngine.LEGACY:
+        return _create_outlines(_expand_bitmap_row_masks(bitmap_row_masks, width), px_to_units)
+    elif outline_engine == OutlineEngine.TRACE:
+        return _create_outlines_by_tracing(bitmap_row_masks, width, px_to_units)
+    elif outline_engine == OutlineEngine.NUMPY:
+        numpy_outlines = _load_numpy_outlines()
+        if numpy_outlines is None:
+            return _create_outlines_by_tracing(bitmap_row_masks, width, px_to_units)
+        return numpy_outlines.create_outlines(bitmap_row_masks, width, px_to_units)
+    else:
+        raise ValueError(f"Unknown outline engine: {outline_engine}")
+
+
+@functools.cache
+def _load_numpy_outlines():
+    """
+    NumPy 为可选依赖，未安装时返回 None，由调用方退回纯 Python 实现
+    """
+    try:
+        from pixel_font_builder import numpy_outlines
+    except ImportError:
+        return None
+    return numpy_outlines
+
+
 def _create_glyph(glyph: Glyph, outlines: list[list[tuple[int, int]]], px_to_units: int, is_ttf: bool) -> OTFGlyph | TTFGlyph:
     if is_ttf:
         pen = TTFGlyphPen()
@@ -281,21 +462,31 @@ def _draw_circle(pen: OTFGlyphPen | TTFGlyphPen, cx: float, cy: float, radius: f
 
     pen.closePath()
 
-def _create_dotted_glyph(glyph: Glyph, px_to_units: int, is_ttf: bool) -> OTFGlyph | TTFGlyph:
+def _create_dots(bitmap_row_masks: list[int], width: int, px_to_units: int) -> list[tuple[float, float]]:
+    """
+    将字形数据转换为圆点圆心，左下角原点坐标系
+    """
+    height = len(bitmap_row_masks)
+    dots = []
+    for y, mask in enumerate(bitmap_row_masks):
+        # 转换左上角原点坐标系为左下角原点坐标系
+        cy = (height - y - 0.5) * px_to_units
+        for bit in _iter_mask_bits(mask):
+            cx = (width - 1 - bit + 0.5) * px_to_units
+            dots.append((cx, cy))
+    return dots
+
+
+def _create_dotted_glyph(glyph: Glyph, dots: list[tuple[float, float]], px_to_units: int, is_ttf: bool) -> OTFGlyph | TTFGlyph:
     # create circles rather than rects. we do not need to create outlines for this.
     if is_ttf:
         pen = TTFGlyphPen()
     else:
         pen = OTFGlyphPen(glyph.advance_width * px_to_units, None)
 
-    for y in range(glyph.height):
-        for x in range(glyph.width):
-            if glyph.bitmap[y][x] > 0:
-                cx = (x + 0.5) * px_to_units
-                # 转换左上角原点坐标系为左下角原点坐标系
-                cy = (glyph.height - y - 0.5) * px_to_units
-                radius = 0.5 * px_to_units
-                _draw_circle(pen, cx, cy, radius)
+    radius = 0.5 * px_to_units
+    for cx, cy in dots:
+        _draw_circle(pen, cx, cy, radius)
 
     if is_ttf:
         return pen.glyph()
@@ -303,48 +494,365 @@ def _create_dotted_glyph(glyph: Glyph, px_to_units: int, is_ttf: bool) -> OTFGly
         return pen.getCharString()
 
 
+def _get_dot_fraction(px_to_units: int) -> float:
+    # every dot centre is at `(n + 0.5) * px_to_units`, so all centres share the fraction of the radius,
+    # a circle drawn at that fraction and moved by whole units rounds its points the same as a circle drawn in place
+    return (0.5 * px_to_units) % 1
 
 
-def _get_glyph_with_cache(glyph: Glyph, px_to_units: int, is_ttf: bool,
-                          family: Family = Family.DOTTED) -> OTFGlyph | TTFGlyph:
-    cache_tag = f'{glyph.advance_width}#{glyph.horizontal_origin}#{glyph.bitmap}'.replace(' ', '')
-    if getattr(glyph, _CACHE_NAME_TAG, None) != cache_tag:
-        setattr(glyph, _CACHE_NAME_OUTLINES, None)
-        setattr(glyph, _CACHE_NAME_OTF_GLYPH, None)
-        setattr(glyph, _CACHE_NAME_TTF_GLYPH, None)
-        setattr(glyph, _CACHE_NAME_TAG, cache_tag)
+def _split_dot_centre(cx: float, cy: float, fraction: float) -> tuple[int, int]:
+    return int(cx - fraction), int(cy - fraction)
 
-    if family == Family.PIXEL:
-        outlines = getattr(glyph, _CACHE_NAME_OUTLINES, None)
-        if outlines is None:
-            outlines = _create_outlines(glyph.bitmap, px_to_units)
-            setattr(glyph, _CACHE_NAME_OUTLINES, outlines)
-
-        cache_name_xtf_glyph = _CACHE_NAME_TTF_GLYPH if is_ttf else _CACHE_NAME_OTF_GLYPH
-        xtf_glyph = getattr(glyph, cache_name_xtf_glyph, None)
-        if xtf_glyph is None:
-            xtf_glyph = _create_glyph(glyph, outlines, px_to_units, is_ttf)
-            setattr(glyph, cache_name_xtf_glyph, xtf_glyph)
+
+@functools.cache
+def _create_otf_dot_template(px_to_units: int) -> tuple[tuple[int, int], list[int | str]]:
+    # the program of a single circle after its moveto, relative to the start point, so it fits any dot
+    radius = 0.5 * px_to_units
+    fraction = _get_dot_fraction(px_to_units)
+    pen = OTFGlyphPen(None, None)
+    _draw_circle(pen, fraction, fraction, radius)
+    program = pen.getCharString().program
+    moveto_index = next(i for i, token in enumerate(program) if isinstance(token, str))
+    start_point = otRound(fraction + radius), otRound(fraction)
+    return start_point, program[moveto_index + 1:-1]
+
+
+@functools.cache
+def _create_ttf_dot_template(px_to_units: int) -> tuple[list[tuple[int, int]], list[int]]:
+    fraction = _get_dot_fraction(px_to_units)
+    pen = TTFGlyphPen()
+    _draw_circle(pen, fraction, fraction, 0.5 * px_to_units)
+    template = pen.glyph()
+    return list(template.coordinates), list(template.flags)
+
+
+def _create_templated_dotted_glyph(glyph: Glyph, dots: list[tuple[float, float]], px_to_units: int, is_ttf: bool) -> OTFGlyph | TTFGlyph:
+    # same circles as `_create_dotted_glyph`, but every dot reuses one precomputed circle instead of going through a pen
+    if is_ttf:
+        if len(dots) == 0:
+            return _create_dotted_glyph(glyph, dots, px_to_units, is_ttf)
+        template_coordinates, template_flags = _create_ttf_dot_template(px_to_units)
+        fraction = _get_dot_fraction(px_to_units)
+        coordinates = []
+        end_points = []
+        for cx, cy in dots:
+            cx, cy = _split_dot_centre(cx, cy, fraction)
+            coordinates.extend((cx + x, cy + y) for x, y in template_coordinates)
+            end_points.append(len(coordinates) - 1)
+        xtf_glyph = TTFGlyph()
+        xtf_glyph.coordinates = GlyphCoordinates(coordinates)
+        xtf_glyph.flags = array('B', template_flags * len(dots))
+        xtf_glyph.endPtsOfContours = end_points
+        xtf_glyph.numberOfContours = len(end_points)
+        xtf_glyph.program = ttProgram.Program()
+        xtf_glyph.program.fromBytecode(b'')
         return xtf_glyph
+    else:
+        start_point, template_program = _create_otf_dot_template(px_to_units)
+        return OTFGlyph(program=_create_otf_dotted_program(glyph, dots, px_to_units, start_point, template_program))
+
+
+def _create_otf_dotted_program(glyph: Glyph, dots: list[tuple[float, float]], px_to_units: int, start_point: tuple[int, int], dot_program: list[int | str]) -> list[int | str]:
+    start_x, start_y = start_point
+    fraction = _get_dot_fraction(px_to_units)
+    program = [otRound(glyph.advance_width * px_to_units)]
+    current_x, current_y = 0, 0
+    for cx, cy in dots:
+        cx, cy = _split_dot_centre(cx, cy, fraction)
+        x, y = cx + start_x, cy + start_y
+        dx, dy = x - current_x, y - current_y
+        if dy == 0:
+            program.extend((dx, 'hmoveto'))
+        elif dx == 0:
+            program.extend((dy, 'vmoveto'))
+        else:
+            program.extend((dx, dy, 'rmoveto'))
+        program.extend(dot_program)
+        current_x, current_y = x, y
+    program.append('endchar')
+    return program
+
+
+def _create_merged_dotted_glyph(glyph: Glyph, dots: list[tuple[float, float]], px_to_units: int, is_ttf: bool) -> OTFGlyph | TTFGlyph:
+    # union all circles in one batch, removing overlapping and touching contours
+    try:
+        import pathops
+    except ImportError as e:
+        raise RuntimeError(f"dot mode {repr(DotMode.MERGED.value)} requires 'skia-pathops', install it with: pip install skia-pathops") from e
+
+    path = pathops.Path()
+    path_pen = path.getPen()
+    radius = 0.5 * px_to_units
+    for cx, cy in dots:
+        _draw_circle(path_pen, cx, cy, radius)
+    path.simplify(fix_winding=True, keep_starting_points=False, clockwise=is_ttf)
+
+    if is_ttf:
+        pen = TTFGlyphPen()
+    else:
+        pen = OTFGlyphPen(glyph.advance_width * px_to_units, None)
+    path.draw(pen)
+    if is_ttf:
+        return pen.glyph()
+    else:
+        return pen.getCharString()
+
+
+def _create_dot_glyph(px_to_units: int) -> TTFGlyph:
+    fraction = _get_dot_fraction(px_to_units)
+    pen = TTFGlyphPen()
+    _draw_circle(pen, fraction, fraction, 0.5 * px_to_units)
+    return pen.glyph()
+
+
+def _create_composite_dotted_glyph(dots: list[tuple[float, float]], px_to_units: int) -> TTFGlyph:
+    # every dot is a component referencing the hidden dot glyph, so the circle is stored only once
+    if len(dots) == 0:
+        return TTFGlyphPen().glyph()
+    fraction = _get_dot_fraction(px_to_units)
+    xtf_glyph = TTFGlyph()
+    xtf_glyph.numberOfContours = -1
+    xtf_glyph.components = []
+    for cx, cy in dots:
+        component = GlyphComponent()
+        component.glyphName = _DOT_GLYPH_NAME
+        component.x, component.y = _split_dot_centre(cx, cy, fraction)
+        component.flags = ROUND_XY_TO_GRID
+        xtf_glyph.components.append(component)
+    return xtf_glyph
+
+
+def _create_dot_subrs(px_to_units: int) -> SubrsIndex:
+    _, template_program = _create_otf_dot_template(px_to_units)
+    subrs = SubrsIndex()
+    subrs.append(OTFGlyph(program=template_program + ['return']))
+    return subrs
+
+
+def _create_subroutine_dotted_glyph(glyph: Glyph, dots: list[tuple[float, float]], px_to_units: int) -> OTFGlyph:
+    # every dot calls the local subroutine 0 from `_create_dot_subrs`, so the circle is stored only once
+    start_point, _ = _create_otf_dot_template(px_to_units)
+    return OTFGlyph(program=_create_otf_dotted_program(glyph, dots, px_to_units, start_point, [-calcSubrBias([None]), 'callsubr']))
+
+
+def _is_composite_dotted(is_ttf: bool, family: Family, dot_mode: DotMode) -> bool:
+    # glyf shares the dot as a component glyph, CFF shares it as a local subroutine instead
+    return is_ttf and family == Family.DOTTED and dot_mode == DotMode.COMPOSITE
+
+
+def _is_subroutine_dotted(is_ttf: bool, family: Family, dot_mode: DotMode) -> bool:
+    return not is_ttf and family == Family.DOTTED and dot_mode == DotMode.COMPOSITE
+
+
+def _create_dotted_glyph_with_mode(glyph: Glyph, dots: list[tuple[float, float]], px_to_units: int, is_ttf: bool, dot_mode: DotMode) -> OTFGlyph | TTFGlyph:
+    if dot_mode == DotMode.SEPARATE:
+        return _create_dotted_glyph(glyph, dots, px_to_units, is_ttf)
+    elif dot_mode == DotMode.TEMPLATE:
+        return _create_templated_dotted_glyph(glyph, dots, px_to_units, is_ttf)
+    elif dot_mode == DotMode.MERGED:
+        return _create_merged_dotted_glyph(glyph, dots, px_to_units, is_ttf)
+    elif dot_mode == DotMode.COMPOSITE:
+        if is_ttf:
+            return _create_composite_dotted_glyph(dots, px_to_units)
+        return _create_subroutine_dotted_glyph(glyph, dots, px_to_units)
+    else:
+        raise ValueError(f"Unknown dot mode: {dot_mode}")
+
+
+def _create_shapes(bitmap_row_masks: list[int], width: int, px_to_units: int, family: Family, outline_engine: OutlineEngine) -> list[list[tuple[int, int]]] | list[tuple[float, float]]:
+    """
+    字形的形状数据，像素字体为轮廓，点阵字体为圆心，只包含普通的点列表以便跨进程传递
+    """
+    if family == Family.PIXEL:
+        return _create_outlines_with_engine(bitmap_row_masks, width, px_to_units, outline_engine)
     elif family == Family.DOTTED:
-        cache_name_xtf_glyph = _CACHE_NAME_TTF_GLYPH if is_ttf else _CACHE_NAME_OTF_GLYPH
-        xtf_glyph = getattr(glyph, cache_name_xtf_glyph, None)
-        if xtf_glyph is None:
-            xtf_glyph = _create_dotted_glyph(glyph, px_to_units, is_ttf)
-            setattr(glyph, cache_name_xtf_glyph, xtf_glyph)
-        return xtf_glyph
+        return _create_dots(bitmap_row_masks, width, px_to_units)
     else:
         raise ValueError(f"Unknown font family: {family}")
 
 
+def _create_shapes_in_worker(args: tuple[list[int], int, int, Family, OutlineEngine]) -> list[list[tuple[int, int]]] | list[tuple[float, float]]:
+    return _create_shapes(*args)
+
+
+def _create_persistent_cache_key(glyph: Glyph, px_to_units: int, is_ttf: bool, family: Family, outline_engine: OutlineEngine, dot_mode: DotMode) -> bytes:
+    hasher = hashlib.sha256()
+    hasher.update(f'{glyph.dimensions}#{glyph.horizontal_origin}#{glyph.advance_width}#{px_to_units}#{family}#{outline_engine}#{dot_mode}#{is_ttf}'.encode())
+    hasher.update(glyph.packed_bitmap)
+    return hasher.digest()
+
+
+def _serialize_xtf_glyph(xtf_glyph: OTFGlyph | TTFGlyph, is_ttf: bool) -> bytes:
+    if is_ttf:
+        return xtf_glyph.compile(None)
+    else:
+        xtf_glyph.compile()
+        return xtf_glyph.bytecode
+
+
+def _deserialize_xtf_glyph(data: bytes, is_ttf: bool) -> OTFGlyph | TTFGlyph:
+    if is_ttf:
+        xtf_glyph = TTFGlyph(data)
+        xtf_glyph.expand(None)
+        return xtf_glyph
+    else:
+        return OTFGlyph(bytecode=data)
+
+
+def _collect_pending_glyphs(
+        glyphs: list[Glyph],
+        px_to_units: int,
+        is_ttf: bool,
+        family: Family,
+        outline_engine: OutlineEngine,
+        dot_mode: DotMode,
+        persistent_cache: GlyphCache | None,
+) -> list[Glyph]:
+    shapes_cache_key = 'shapes', family, px_to_units, outline_engine
+    xtf_glyph_cache_key = 'xtf_glyph', family, px_to_units, outline_engine, dot_mode, is_ttf
+    pending_glyphs = []
+    for glyph in glyphs:
+        glyph_cache = glyph.get_cache(_CACHE_NAME)
+        if shapes_cache_key in glyph_cache or xtf_glyph_cache_key in glyph_cache:
+            continue
+        if persistent_cache is not None and _create_persistent_cache_key(glyph, px_to_units, is_ttf, family, outline_engine, dot_mode) in persistent_cache:
+            continue
+        pending_glyphs.append(glyph)
+    return pending_glyphs
+
+
+def _fill_shapes_cache_in_parallel(
+        glyphs: list[Glyph],
+        px_to_units: int,
+        is_ttf: bool,
+        family: Family,
+        outline_engine: OutlineEngine,
+        dot_mode: DotMode,
+        workers: int,
+        persistent_cache: GlyphCache | None = None,
+):
+    shapes_cache_key = 'shapes', family, px_to_units, outline_engine
+    pending_glyphs = _collect_pending_glyphs(glyphs, px_to_units, is_ttf, family, outline_engine, dot_mode, persistent_cache)
+    if len(pending_glyphs) == 0:
+        return
+
+    chunk_size = max(1, len(pending_glyphs) // (workers * 4))
+    tasks = [(glyph.bitmap_row_masks, glyph.width, px_to_units, family, outline_engine) for glyph in pending_glyphs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for glyph, shapes in zip(pending_glyphs, executor.map(_create_shapes_in_worker, tasks, chunksize=chunk_size)):
+            glyph.get_cache(_CACHE_NAME)[shapes_cache_key] = shapes
+
+
+def _fill_shapes_cache_in_batches(
+        glyphs: list[Glyph],
+        px_to_units: int,
+        is_ttf: bool,
+        dot_mode: DotMode,
+        persistent_cache: GlyphCache | None = None,
+):
+    """
+    Create the outlines of the `NUMPY` engine for all the glyphs of the same dimensions at once.
+    """
+    numpy_outlines = _load_numpy_outlines()
+    if numpy_outlines is None:
+        return
+    shapes_cache_key = 'shapes', Family.PIXEL, px_to_units, OutlineEngine.NUMPY
+    dimensions_to_glyphs = {}
+    for glyph in _collect_pending_glyphs(glyphs, px_to_units, is_ttf, Family.PIXEL, OutlineEngine.NUMPY, dot_mode, persistent_cache):
+        dimensions_to_glyphs.setdefault(glyph.dimensions, []).append(glyph)
+    for (width, height), same_dimensions_glyphs in dimensions_to_glyphs.items():
+        bitmaps = numpy_outlines.unpack_bitmaps([glyph.packed_bitmap for glyph in same_dimensions_glyphs], width, height)
+        for glyph, outlines in zip(same_dimensions_glyphs, numpy_outlines.create_outlines_in_batches(bitmaps, px_to_units)):
+            glyph.get_cache(_CACHE_NAME)[shapes_cache_key] = outlines
+
+
+def _get_glyph_with_cache(glyph: Glyph, px_to_units: int, is_ttf: bool,
+                          family: Family = Family.DOTTED,
+                          outline_engine: OutlineEngine = OutlineEngine.TRACE,
+                          dot_mode: DotMode = DotMode.SEPARATE,
+                          persistent_cache: GlyphCache | None = None,
+                          profiler: Profiler = _DISABLED_PROFILER,
+                          compiled_glyph_names: set[str] | None = None) -> OTFGlyph | TTFGlyph:
+    glyph_cache = glyph.get_cache(_CACHE_NAME)
+    xtf_glyph_cache_key = 'xtf_glyph', family, px_to_units, outline_engine, dot_mode, is_ttf
+    xtf_glyph = glyph_cache.get(xtf_glyph_cache_key)
+    if xtf_glyph is not None:
+        profiler.count('opentype.glyph_cache_hits')
+        return xtf_glyph
+
+    # components are compiled as glyph ids, which depend on the glyph order, so they are not persisted
+    if _is_composite_dotted(is_ttf, family, dot_mode):
+        persistent_cache = None
+
+    persistent_cache_key = None
+    if persistent_cache is not None:
+        persistent_cache_key = _create_persistent_cache_key(glyph, px_to_units, is_ttf, family, outline_engine, dot_mode)
+        data = persistent_cache.get(persistent_cache_key)
+        if data is not None:
+            profiler.count('opentype.persistent_cache_hits')
+            xtf_glyph = _deserialize_xtf_glyph(data, is_ttf)
+            glyph_cache[xtf_glyph_cache_key] = xtf_glyph
+            return xtf_glyph
+
+    shapes_cache_key = 'shapes', family, px_to_units, outline_engine
+    shapes = glyph_cache.get(shapes_cache_key)
+    if shapes is None:
+        with profiler.phase('opentype.shapes'):
+            shapes = _create_shapes(glyph.bitmap_row_masks, glyph.width, px_to_units, family, outline_engine)
+        glyph_cache[shapes_cache_key] = shapes
+
+    with profiler.phase('opentype.draw'):
+        if family == Family.PIXEL:
+            xtf_glyph = _create_glyph(glyph, shapes, px_to_units, is_ttf)
+        else:
+            xtf_glyph = _create_dotted_glyph_with_mode(glyph, shapes, px_to_units, is_ttf, dot_mode)
+    glyph_cache[xtf_glyph_cache_key] = xtf_glyph
+    if compiled_glyph_names is not None:
+        compiled_glyph_names.add(glyph.name)
+    if profiler.enabled:
+        profiler.count('opentype.glyphs_compiled')
+        if family == Family.PIXEL:
+            profiler.count('opentype.contours', len(shapes))
+            profiler.count('opentype.points', sum(len(outline) for outline in shapes))
+        else:
+            profiler.count('opentype.dots', len(shapes))
+    if persistent_cache is not None:
+        persistent_cache.put(persistent_cache_key, _serialize_xtf_glyph(xtf_glyph, is_ttf))
+    return xtf_glyph
+
+
+def _subroutinize(font: TTFont):
+    try:
+        import cffsubr
+    except ImportError as e:
+        raise RuntimeError("CFF subroutinization requires 'cffsubr', install it with: pip install cffsubr") from e
+    cffsubr.subroutinize(font)
+
+
 def create_builder(context: 'pixel_font_builder.FontBuilder', is_ttf: bool,
                    family: Family = Family.DOTTED,
-                   flavor: Flavor | None = None) -> FontBuilder:
+                   flavor: Flavor | None = None,
+                   prepared_glyphs: tuple[list[str], Mapping[str, Glyph], CodePointIndex] | None = None,
+                   cache: GlyphCache | None = None,
+                   compiled_glyph_names: set[str] | None = None) -> FontBuilder:
+    """
+    With `compiled_glyph_names`, the names of the glyphs compiled in this build, not served by any cache, are added to it.
+    """
     config = context.opentype_config
+    profiler = context.profiler
+    if cache is None:
+        cache = config.cache
     font_metric = context.font_metric * config.px_to_units
     meta_info = context.meta_info
-    character_mapping = context.character_mapping
-    glyph_order, name_to_glyph = context.prepare_glyphs()
+    if prepared_glyphs is None:
+        with profiler.phase('prepare_glyphs'):
+            prepared_glyphs = context.prepare_glyphs()
+    glyph_order, name_to_glyph, code_point_index = prepared_glyphs
+    is_composite_dotted = _is_composite_dotted(is_ttf, family, config.dot_mode)
+    if is_composite_dotted:
+        if _DOT_GLYPH_NAME in name_to_glyph:
+            raise RuntimeError(f'glyph name reserved for composite dots: {repr(_DOT_GLYPH_NAME)}')
+        glyph_order = glyph_order + [_DOT_GLYPH_NAME]
 
     builder = FontBuilder(font_metric.font_size, isTTF=is_ttf, glyphDataFormat=1)
 
@@ -357,54 +865,84 @@ def create_builder(context: 'pixel_font_builder.FontBuilder', is_ttf: bool,
     builder.setupNameTable(name_strings)
 
     builder.setupGlyphOrder(glyph_order)
-    xtf_glyphs = {}
-    for glyph_name, glyph in name_to_glyph.items():
-        xtf_glyphs[glyph_name] = _get_glyph_with_cache(glyph, config.px_to_units, is_ttf, family)
-    if is_ttf:
-        builder.setupGlyf(xtf_glyphs)
-    else:
-        builder.setupCFF('', {}, xtf_glyphs, {})
+    with profiler.phase('opentype.glyphs'):
+        # the shapes are cached on the glyph objects, which a provider does not keep
+        if config.workers > 1 and not isinstance(name_to_glyph, ProvidedGlyphs):
+            with profiler.phase('opentype.shapes_in_parallel'):
+                _fill_shapes_cache_in_parallel(list(name_to_glyph.values()), config.px_to_units, is_ttf, family, config.outline_engine, config.dot_mode, config.workers, cache)
+        elif config.outline_engine == OutlineEngine.NUMPY and family == Family.PIXEL and not isinstance(name_to_glyph, ProvidedGlyphs):
+            with profiler.phase('opentype.shapes_in_batches'):
+                _fill_shapes_cache_in_batches(list(name_to_glyph.values()), config.px_to_units, is_ttf, config.dot_mode, cache)
+        # the metrics are taken in the same pass, so that every glyph is looked up only once
+        xtf_glyphs = {}
+        horizontal_metrics = {}
+        vertical_metrics = {}
+        for glyph_name, glyph in name_to_glyph.items():
+            xtf_glyphs[glyph_name] = _get_glyph_with_cache(glyph, config.px_to_units, is_ttf, family, config.outline_engine, config.dot_mode, cache, profiler, compiled_glyph_names)
 
-    builder.setupCharacterMap(character_mapping)
+            advance_width = glyph.advance_width * config.px_to_units
+            left_side_bearing = (glyph.calculate_bitmap_left_padding() + glyph.horizontal_origin_x) * config.px_to_units
+            horizontal_metrics[glyph_name] = advance_width, left_side_bearing
 
-    horizontal_metrics = {}
-    vertical_metrics = {}
-    for glyph_name in glyph_order:
-        glyph = name_to_glyph[glyph_name]
+            advance_height = glyph.advance_height * config.px_to_units
+            top_side_bearing = (glyph.calculate_bitmap_top_padding() + glyph.vertical_origin_y) * config.px_to_units
+            vertical_metrics[glyph_name] = advance_height, top_side_bearing
+        if is_composite_dotted:
+            xtf_glyphs[_DOT_GLYPH_NAME] = _create_dot_glyph(config.px_to_units)
+            horizontal_metrics[_DOT_GLYPH_NAME] = 0, otRound(-0.5 * config.px_to_units)
+            vertical_metrics[_DOT_GLYPH_NAME] = 0, 0
+        if cache is not None:
+            cache.flush()
+    with profiler.phase('opentype.setup_outlines'):
+        if is_ttf:
+            builder.setupGlyf(xtf_glyphs)
+        else:
+            private_dict = {}
+            if _is_subroutine_dotted(is_ttf, family, config.dot_mode):
+                private_dict['Subrs'] = _create_dot_subrs(config.px_to_units)
+            builder.setupCFF('', {}, xtf_glyphs, private_dict)
 
-        advance_width = glyph.advance_width * config.px_to_units
-        left_side_bearing = (glyph.calculate_bitmap_left_padding() + glyph.horizontal_origin_x) * config.px_to_units
-        horizontal_metrics[glyph_name] = advance_width, left_side_bearing
+    with profiler.phase('opentype.setup_tables'):
+        # already sorted, so that the sort in building the subtables is cheap
+        builder.setupCharacterMap(code_point_index.to_dict())
 
-        advance_height = glyph.advance_height * config.px_to_units
-        top_side_bearing = (glyph.calculate_bitmap_top_padding() + glyph.vertical_origin_y) * config.px_to_units
-        vertical_metrics[glyph_name] = advance_height, top_side_bearing
-    builder.setupHorizontalMetrics(horizontal_metrics)
-    builder.setupVerticalMetrics(vertical_metrics)
+        builder.setupHorizontalMetrics(horizontal_metrics)
+        builder.setupVerticalMetrics(vertical_metrics)
 
-    builder.setupHorizontalHeader(
-        ascent=font_metric.horizontal_layout.ascent,
-        descent=font_metric.horizontal_layout.descent,
-        lineGap=font_metric.horizontal_layout.line_gap,
-    )
-    builder.setupVerticalHeader(
-        ascent=font_metric.vertical_layout.ascent,
-        descent=font_metric.vertical_layout.descent,
-        lineGap=font_metric.vertical_layout.line_gap,
-    )
-    builder.setupOS2(
-        sTypoAscender=font_metric.horizontal_layout.ascent,
-        sTypoDescender=font_metric.horizontal_layout.descent,
-        sTypoLineGap=font_metric.horizontal_layout.line_gap,
-        usWinAscent=font_metric.horizontal_layout.ascent,
-        usWinDescent=-font_metric.horizontal_layout.descent,
-        sxHeight=font_metric.x_height,
-        sCapHeight=font_metric.cap_height,
-    )
-    builder.setupPost()
+        builder.setupHorizontalHeader(
+            ascent=font_metric.horizontal_layout.ascent,
+            descent=font_metric.horizontal_layout.descent,
+            lineGap=font_metric.horizontal_layout.line_gap,
+        )
+        builder.setupVerticalHeader(
+            ascent=font_metric.vertical_layout.ascent,
+            descent=font_metric.vertical_layout.descent,
+            lineGap=font_metric.vertical_layout.line_gap,
+        )
+        builder.setupOS2(
+            sTypoAscender=font_metric.horizontal_layout.ascent,
+            sTypoDescender=font_metric.horizontal_layout.descent,
+            sTypoLineGap=font_metric.horizontal_layout.line_gap,
+            usWinAscent=font_metric.horizontal_layout.ascent,
+            usWinDescent=-font_metric.horizontal_layout.descent,
+            sxHeight=font_metric.x_height,
+            sCapHeight=font_metric.cap_height,
+        )
+        builder.setupPost()
+
+    with profiler.phase('opentype.features'):
+        for feature_file in config.feature_files:
+            builder.addOpenTypeFeatures(feature_file.text, feature_file.file_path)
 
-    for feature_file in config.feature_files:
-        builder.addOpenTypeFeatures(feature_file.text, feature_file.file_path)
+    if config.subroutinize and not is_ttf:
+        with profiler.phase('opentype.subroutinize'):
+            _subroutinize(builder.font)
+
+    if profiler.enabled:
+        with profiler.phase('opentype.outline_stats'):
+            outline_stats = calculate_outline_stats(builder.font)
+        profiler.count('opentype.output_contours', outline_stats.contours_count)
+        profiler.count('opentype.output_points', outline_stats.points_count)
 
     if flavor is not None:
         builder.font.flavor = flavor
@@ -412,9 +950,125 @@ def create_builder(context: 'pixel_font_builder.FontBuilder', is_ttf: bool,
     return builder
 
 
-def create_collection_builder(contexts: 'pixel_font_builder.FontCollectionBuilder', is_ttf: bool) -> TTCollection:
+class OutlineStats:
+    glyphs_count: int
+    contours_count: int
+    points_count: int
+
+    def __init__(
+            self,
+            glyphs_count: int = 0,
+            contours_count: int = 0,
+            points_count: int = 0,
+    ):
+        self.glyphs_count = glyphs_count
+        self.contours_count = contours_count
+        self.points_count = points_count
+
+
+def calculate_outline_stats(font: TTFont) -> OutlineStats:
+    """
+    Counts the contours and points of all glyphs as drawn, components decomposed,
+    since file size and rasterization time scale with them.
+    """
+    stats = OutlineStats()
+    glyph_set = font.getGlyphSet()
+    for glyph_name in font.getGlyphOrder():
+        pen = DecomposingRecordingPen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        stats.glyphs_count += 1
+        for operator, operands in pen.value:
+            if operator == 'moveTo':
+                stats.contours_count += 1
+            stats.points_count += len(operands)
+    return stats
+
+
+def compile_builder(builder: FontBuilder) -> bytes:
+    stream = BytesIO()
+    builder.save(stream)
+    return stream.getvalue()
+
+
+def save_compiled(data: bytes, file_path: str | PathLike[str], flavor: Flavor | None = None):
+    """
+    Write compiled font bytes into the flavor, the tables are not decompiled, so they are copied as is.
+    """
+    if flavor is None:
+        with open(file_path, 'wb') as file:
+            file.write(data)
+    else:
+        font = TTFont(BytesIO(data), recalcBBoxes=False, recalcTimestamp=False)
+        font.flavor = flavor
+        font.save(file_path)
+
+
+def save_flavors(builder: FontBuilder, outputs: list[tuple[str | PathLike[str], Flavor | None]]):
+    """
+    Compile the font tables once, then write the same compiled tables into every requested flavor.
+    """
+    data = compile_builder(builder)
+    for file_path, flavor in outputs:
+        save_compiled(data, file_path, flavor)
+
+
+def _create_shared_tables_key(context: 'pixel_font_builder.FontBuilder', is_ttf: bool, family: Family) -> tuple | None:
+    # feature files can write into the 'name' and 'OS/2' tables, such members are always built in full
+    config = context.opentype_config
+    if len(config.feature_files) > 0:
+        return None
+    font_metric = context.font_metric
+    return (
+        is_ttf,
+        family,
+        config.px_to_units,
+        config.outline_engine,
+        config.dot_mode,
+        config.subroutinize,
+        font_metric.font_size,
+        font_metric.horizontal_layout.ascent,
+        font_metric.horizontal_layout.descent,
+        font_metric.horizontal_layout.line_gap,
+        font_metric.vertical_layout.ascent,
+        font_metric.vertical_layout.descent,
+        font_metric.vertical_layout.line_gap,
+        font_metric.x_height,
+        font_metric.cap_height,
+        tuple(sorted(context.character_mapping.items())),
+        context.deduplicate_glyphs,
+        # a provider is taken as unchanged during the build, and its glyphs are not loaded for the key
+        id(context.glyphs) if isinstance(context.glyphs, GlyphProvider) else tuple((id(glyph), glyph.revision) for glyph in context.glyphs),
+    )
+
+
+def _create_member_font(context: 'pixel_font_builder.FontBuilder', shared_data: bytes) -> TTFont:
+    # only 'name' and 'head' differ between members with the same key, the other tables stay as compiled bytes
+    meta_info = context.meta_info
+    font = TTFont(BytesIO(shared_data), recalcBBoxes=False, recalcTimestamp=False)
+    builder = FontBuilder(font=font)
+    builder.setupNameTable(_create_name_strings(meta_info))
+    # the times are always set, otherwise a member would keep the times of the member that compiled the shared tables
+    now = timeTools.timestampNow()
+    setattr(font['head'], 'created', now if meta_info.created_time is None else timeTools.timestampSinceEpoch(meta_info.created_time.timestamp()))
+    setattr(font['head'], 'modified', now if meta_info.modified_time is None else timeTools.timestampSinceEpoch(meta_info.modified_time.timestamp()))
+    return font
+
+
+def create_collection_builder(contexts: 'pixel_font_builder.FontCollectionBuilder', is_ttf: bool,
+                              family: Family = Family.DOTTED) -> TTCollection:
     collection_builder = TTCollection()
+    key_to_shared_data = {}
     for context in contexts:
-        builder = create_builder(context, is_ttf)
-        collection_builder.fonts.append(builder.font)
+        shared_tables_key = _create_shared_tables_key(context, is_ttf, family)
+        shared_data = key_to_shared_data.get(shared_tables_key) if shared_tables_key is not None else None
+        if shared_data is not None:
+            collection_builder.fonts.append(_create_member_font(context, shared_data))
+            continue
+        builder = create_builder(context, is_ttf, family)
+        if shared_tables_key is None:
+            collection_builder.fonts.append(builder.font)
+            continue
+        shared_data = compile_builder(builder)
+        key_to_shared_data[shared_tables_key] = shared_data
+        collection_builder.fonts.append(_create_member_font(context, shared_data))
     return collection_builder
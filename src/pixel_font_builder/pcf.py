@@ -1,13 +1,31 @@
 import math
-from collections import ChainMap
+from array import array
+from collections.abc import Mapping
 
-from pcffont import PcfFontBuilder, PcfGlyph
+from pcffont import PcfFont, PcfFontBuilder, PcfGlyph
+from pcffont.format import PcfTableFormat
+from pcffont.metric import PcfMetric
+from pcffont.t_bitmaps import PcfBitmaps
+
+# the packed bitmaps table writes through the internals of 'pcffont', which may change in any release,
+# so it is only used when they are as expected, otherwise the bitmaps are dumped by 'pcffont' itself
+try:
+    from pcffont.internal.buffer import Buffer
+    _PACKED_BITMAPS_SUPPORTED = hasattr(PcfBitmaps(), '_compat_info') and hasattr(PcfBitmaps, 'GLYPH_PAD_OPTIONS')
+except ImportError:
+    Buffer = None
+    _PACKED_BITMAPS_SUPPORTED = False
 
 import pixel_font_builder
+from pixel_font_builder.cmap import CodePointIndex
+from pixel_font_builder.glyph import Glyph
 from pixel_font_builder.meta import SerifStyle, SlantStyle, WidthStyle
 
 _DEFAULT_CHAR = 0xFFFE
 
+_REVERSED_BITS = bytes(int(f'{i:08b}'[::-1], 2) for i in range(256))
+_SCAN_UNIT_TO_ARRAY_TYPECODE = {2: 'H', 4: 'I'}
+
 
 class Config:
     resolution_x: int
@@ -37,14 +55,139 @@ class Config:
         self.scan_unit_index = scan_unit_index
 
 
-def create_builder(context: 'pixel_font_builder.FontBuilder') -> PcfFontBuilder:
+class _GlyphBackedPcfGlyph(PcfGlyph):
+    glyph: Glyph
+
+    def __init__(
+            self,
+            glyph: Glyph,
+            encoding: int,
+            scalable_width: int = 0,
+    ):
+        super().__init__(
+            name=glyph.name,
+            encoding=encoding,
+            scalable_width=scalable_width,
+            character_width=glyph.advance_width,
+            dimensions=glyph.dimensions,
+            origin=glyph.horizontal_origin,
+            bitmap=glyph.lazy_bitmap,
+        )
+        self.glyph = glyph
+
+    def create_metric(self, is_ink: bool) -> PcfMetric:
+        metric = super().create_metric(False)
+        if not is_ink:
+            return metric
+
+        # Reuse the ink box cached on the glyph instead of scanning the bitmap again
+        ink_box = self.glyph.calculate_bitmap_ink_box()
+        if ink_box is None:
+            metric.ascent = 0
+            metric.descent = 0
+            metric.right_side_bearing = metric.left_side_bearing
+            return metric
+        left, top, right, bottom = ink_box
+        metric.left_side_bearing += left
+        metric.right_side_bearing -= self.width - right
+        metric.ascent -= top
+        metric.descent -= self.height - bottom
+        return metric
+
+
+def _swap_scan_units(data: bytes, scan_unit: int) -> bytes:
+    # like pcffont, only the scan units of 2 and 4 bytes are swapped
+    if scan_unit not in _SCAN_UNIT_TO_ARRAY_TYPECODE:
+        return data
+    if len(data) % scan_unit == 0:
+        units = array(_SCAN_UNIT_TO_ARRAY_TYPECODE[scan_unit], data)
+        units.byteswap()
+        return units.tobytes()
+    # a trailing partial unit is kept as is
+    tail_size = len(data) % scan_unit
+    return _swap_scan_units(data[:-tail_size], scan_unit) + data[-tail_size:]
+
+
+def _pack_glyph_bitmap(glyph: Glyph, table_format: PcfTableFormat) -> bytes:
+    """
+    The PCF bitmap of the glyph, converted from the packed bitmap with byte operations only.
+    """
+    glyph_pad = PcfBitmaps.GLYPH_PAD_OPTIONS[table_format.glyph_pad_index]
+    scan_unit = PcfBitmaps.SCAN_UNIT_OPTIONS[table_format.scan_unit_index]
+
+    # the packed rows are already most significant bit first, padded to a byte
+    data = glyph.packed_bitmap
+    row_size = glyph.bitmap_row_size
+    glyph_row_pad = math.ceil(glyph.width / (glyph_pad * 8)) * glyph_pad
+    if glyph_row_pad != row_size:
+        padding = bytes(glyph_row_pad - row_size)
+        data = b''.join(data[i:i + row_size] + padding for i in range(0, row_size * glyph.height, row_size))
+
+    if not table_format.ms_bit_first:
+        data = data.translate(_REVERSED_BITS)
+    if table_format.ms_byte_first != table_format.ms_bit_first:
+        data = _swap_scan_units(data, scan_unit)
+    return data
+
+
+class _PackedPcfBitmaps(PcfBitmaps):
+    glyphs: list[Glyph]
+
+    def __init__(self, table_format: PcfTableFormat, glyphs: list[Glyph]):
+        super().__init__(table_format, [glyph.lazy_bitmap for glyph in glyphs])
+        self.glyphs = glyphs
+
+    def dump(self, buffer: 'Buffer', font: PcfFont, table_offset: int) -> int:
+        # same layout as `PcfBitmaps.dump`, but without going through the bits one by one
+        glyph_pad = PcfBitmaps.GLYPH_PAD_OPTIONS[self.table_format.glyph_pad_index]
+
+        glyphs_count = len(self.glyphs)
+        bitmap_offsets = []
+        chunks = []
+        bitmaps_size = 0
+        for glyph in self.glyphs:
+            bitmap_offsets.append(bitmaps_size)
+            data = _pack_glyph_bitmap(glyph, self.table_format)
+            chunks.append(data)
+            bitmaps_size += len(data)
+
+        if self._compat_info is not None:
+            bitmaps_sizes = list(self._compat_info)
+            bitmaps_sizes[self.table_format.glyph_pad_index] = bitmaps_size
+        else:
+            bitmaps_sizes = [bitmaps_size // glyph_pad * glyph_pad_option for glyph_pad_option in PcfBitmaps.GLYPH_PAD_OPTIONS]
+
+        buffer.seek(table_offset)
+        buffer.write_uint32(self.table_format.value)
+        buffer.write_uint32(glyphs_count, self.table_format.ms_byte_first)
+        buffer.write_uint32_list(bitmap_offsets, self.table_format.ms_byte_first)
+        buffer.write_uint32_list(bitmaps_sizes, self.table_format.ms_byte_first)
+        buffer.write(b''.join(chunks))
+        buffer.align_to_bit32_with_nulls()
+
+        table_size = buffer.tell() - table_offset
+        return table_size
+
+
+class _PackedPcfFontBuilder(PcfFontBuilder):
+    def build(self) -> PcfFont:
+        font = super().build()
+        if _PACKED_BITMAPS_SUPPORTED and all(isinstance(glyph, _GlyphBackedPcfGlyph) for glyph in self.glyphs):
+            font.bitmaps = _PackedPcfBitmaps(font.bitmaps.table_format, [glyph.glyph for glyph in self.glyphs])
+        return font
+
+
+def create_builder(context: 'pixel_font_builder.FontBuilder', prepared_glyphs: tuple[list[str], Mapping[str, Glyph], CodePointIndex] | None = None) -> PcfFontBuilder:
     config = context.pcf_config
     font_metric = context.font_metric
     meta_info = context.meta_info
-    character_mapping = ChainMap({_DEFAULT_CHAR: '.notdef'}, context.character_mapping)
-    _, name_to_glyph = context.prepare_glyphs()
+    profiler = context.profiler
+    if prepared_glyphs is None:
+        with profiler.phase('prepare_glyphs'):
+            prepared_glyphs = context.prepare_glyphs()
+    _, name_to_glyph, code_point_index = prepared_glyphs
 
-    builder = PcfFontBuilder()
+    builder = _PackedPcfFontBuilder()
     builder.config.font_ascent = font_metric.horizontal_layout.ascent
     builder.config.font_descent = -font_metric.horizontal_layout.descent
     builder.config.default_char = _DEFAULT_CHAR
@@ -54,19 +197,15 @@ def create_builder(context: 'pixel_font_builder.FontBuilder') -> PcfFontBuilder:
     builder.config.glyph_pad_index = config.glyph_pad_index
     builder.config.scan_unit_index = config.scan_unit_index
 
-    for code_point, glyph_name in sorted(character_mapping.items()):
-        if code_point > 0xFFFF:
-            break
+    total_width = 0
+    for code_point, glyph_name in code_point_index.items(True, _DEFAULT_CHAR):
         glyph = name_to_glyph[glyph_name]
-        builder.glyphs.append(PcfGlyph(
-            name=glyph_name,
+        builder.glyphs.append(_GlyphBackedPcfGlyph(
+            glyph=glyph,
             encoding=code_point,
             scalable_width=math.ceil((glyph.advance_width / font_metric.font_size) * (75 / config.resolution_x) * 1000),
-            character_width=glyph.advance_width,
-            dimensions=glyph.dimensions,
-            origin=glyph.horizontal_origin,
-            bitmap=glyph.bitmap,
         ))
+        total_width += glyph.advance_width
 
     builder.properties.foundry = meta_info.manufacturer
     builder.properties.family_name = meta_info.family_name
@@ -100,7 +239,7 @@ def create_builder(context: 'pixel_font_builder.FontBuilder') -> PcfFontBuilder:
         builder.properties.spacing = 'D'
     elif meta_info.width_style == WidthStyle.PROPORTIONAL:
         builder.properties.spacing = 'P'
-    builder.properties.average_width = round(sum([glyph.character_width * 10 for glyph in builder.glyphs]) / len(builder.glyphs))
+    builder.properties.average_width = round(total_width * 10 / len(builder.glyphs))
     builder.properties.charset_registry = 'ISO10646'
     builder.properties.charset_encoding = '1'
     builder.properties.generate_xlfd()
@@ -112,4 +251,5 @@ def create_builder(context: 'pixel_font_builder.FontBuilder') -> PcfFontBuilder:
     builder.properties.copyright = meta_info.copyright_info
     builder.properties['LICENSE'] = meta_info.license_info
 
+    profiler.count('pcf.glyphs', len(builder.glyphs))
     return builder
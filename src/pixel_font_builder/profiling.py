@@ -0,0 +1,103 @@
+import cProfile
+import json
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from os import PathLike
+from typing import Any
+
+_NULL_PHASE = nullcontext()
+
+
+class Profiler:
+    """
+    Times named build phases and counts per-glyph events.
+
+    Disabled by default, then `phase` returns a shared no-op context manager and `count` returns at once.
+    Phases can be nested, the time of a phase includes its inner phases.
+    """
+
+    enabled: bool
+    callback: Callable[[str, float], None] | None
+    phase_seconds: dict[str, float]
+    phase_calls: dict[str, int]
+    counters: dict[str, int]
+
+    def __init__(
+            self,
+            enabled: bool = True,
+            callback: Callable[[str, float], None] | None = None,
+            cprofile: bool = False,
+    ):
+        self.enabled = enabled
+        self.callback = callback
+        self.phase_seconds = {}
+        self.phase_calls = {}
+        self.counters = {}
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._depth = 0
+
+    def __getstate__(self) -> dict[str, Any]:
+        # sent to worker processes without the callback and the cProfile session, which can not be pickled
+        return {'enabled': self.enabled}
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__init__(state['enabled'])
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._phase(name)
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        if self._depth == 0 and self._cprofile is not None:
+            self._cprofile.enable()
+        self._depth += 1
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start_time
+            self._depth -= 1
+            if self._depth == 0 and self._cprofile is not None:
+                self._cprofile.disable()
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0) + seconds
+            self.phase_calls[name] = self.phase_calls.get(name, 0) + 1
+            if self.callback is not None:
+                self.callback(name, seconds)
+
+    def count(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, report: dict[str, Any]):
+        """
+        Add up a report from `to_dict`, e.g. one collected in a worker process.
+        """
+        for name, phase in report['phases'].items():
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0) + phase['seconds']
+            self.phase_calls[name] = self.phase_calls.get(name, 0) + phase['calls']
+        for name, value in report['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        self.phase_seconds.clear()
+        self.phase_calls.clear()
+        self.counters.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'phases': {name: {'seconds': self.phase_seconds[name], 'calls': self.phase_calls[name]} for name in self.phase_seconds},
+            'counters': dict(self.counters),
+        }
+
+    def save_json(self, file_path: str | PathLike[str]):
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def save_pstats(self, file_path: str | PathLike[str]):
+        if self._cprofile is None:
+            raise RuntimeError('cProfile is not enabled, create the profiler with `cprofile=True`')
+        self._cprofile.dump_stats(file_path)
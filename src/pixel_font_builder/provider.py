@@ -0,0 +1,48 @@
+from collections.abc import Iterator, Mapping
+from typing import Protocol, runtime_checkable
+
+from pixel_font_builder.glyph import Glyph
+
+
+@runtime_checkable
+class GlyphProvider(Protocol):
+    """
+    Glyphs loaded on demand, which `FontBuilder.glyphs` accepts in place of a list.
+
+    The backends ask for a glyph when they need it and drop it right after, so a glyph may be loaded more than once,
+    and the provider should not keep the glyphs it returns. The glyphs must not change during a build.
+    """
+
+    def get_glyph_names(self) -> list[str]:
+        ...
+
+    def load_glyph(self, glyph_name: str) -> Glyph:
+        ...
+
+
+class ProvidedGlyphs(Mapping[str, Glyph]):
+    """
+    The name to glyph mapping of a provider, every lookup loads the glyph again.
+    """
+
+    provider: GlyphProvider
+    glyph_names: list[str]
+
+    def __init__(self, provider: GlyphProvider, glyph_names: list[str]):
+        self.provider = provider
+        self.glyph_names = glyph_names
+        self._glyph_names_set = set(glyph_names)
+
+    def __getitem__(self, glyph_name: str) -> Glyph:
+        if glyph_name not in self._glyph_names_set:
+            raise KeyError(glyph_name)
+        return self.provider.load_glyph(glyph_name)
+
+    def __contains__(self, glyph_name: object) -> bool:
+        return glyph_name in self._glyph_names_set
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.glyph_names)
+
+    def __len__(self) -> int:
+        return len(self.glyph_names)
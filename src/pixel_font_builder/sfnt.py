@@ -0,0 +1,180 @@
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from os import PathLike
+from typing import BinaryIO
+
+from fontTools.ttLib import TTFont, getSearchRange, getTableClass
+from fontTools.ttLib.ttFont import sortedTagList
+
+_CHECKSUM_BLOCK_SIZE = 1 << 16
+_CHECKSUM_MAGIC = 0xB1B0AFBA
+
+
+def calculate_checksum(data: bytes | memoryview | mmap.mmap) -> int:
+    """
+    The sum of the big-endian 32-bit words, the data padded with zeros to a multiple of 4 bytes.
+    The data is read in blocks through a memoryview, so a table in a mapped file is never copied as a whole.
+    """
+    checksum = 0
+    with memoryview(data) as view:
+        for start in range(0, len(view), _CHECKSUM_BLOCK_SIZE):
+            block = view[start:start + _CHECKSUM_BLOCK_SIZE]
+            remainder = len(block) % 4
+            words = array('I')
+            words.frombytes(block if remainder == 0 else bytes(block) + b'\0' * (4 - remainder))
+            if sys.byteorder == 'little':
+                words.byteswap()
+            checksum += sum(words)
+    return checksum & 0xFFFFFFFF
+
+
+class _FontLayout:
+    """
+    Where a font's table directory and tables were written, the tables as `tag -> (offset, length)`.
+    """
+
+    sfnt_version: bytes
+    directory_offset: int
+    tables: dict[str, tuple[int, int]]
+
+    def __init__(self, sfnt_version: bytes, directory_offset: int):
+        self.sfnt_version = sfnt_version
+        self.directory_offset = directory_offset
+        self.tables = {}
+
+
+def _get_table_tags(font: TTFont) -> list[str]:
+    if font.recalcTimestamp and 'head' in font:
+        # load 'head', so that its timestamp is recalculated on compiling
+        font['head']
+    return [tag for tag in font.keys() if tag != 'GlyphOrder']
+
+
+def _iter_compiled_tables(font: TTFont, tags: list[str]) -> Iterator[tuple[str, bytes]]:
+    # the same order as `TTFont.save`, every table compiled after the tables it depends on
+    done = set()
+
+    def visit(tag: str) -> Iterator[tuple[str, bytes]]:
+        if tag in done:
+            return
+        for dependency in getTableClass(tag).dependencies:
+            if dependency in font:
+                yield from visit(dependency)
+            else:
+                done.add(dependency)
+        done.add(tag)
+        yield tag, font.getTableData(tag)
+
+    for tag in tags:
+        yield from visit(tag)
+
+
+def _write_table(file: BinaryIO, data: bytes) -> tuple[int, int]:
+    offset = file.tell()
+    file.write(data)
+    file.write(b'\0' * (-len(data) % 4))
+    return offset, len(data)
+
+
+def _reserve_directory(file: BinaryIO, font: TTFont, tags: list[str]) -> _FontLayout:
+    layout = _FontLayout(font.sfntVersion.encode('latin-1'), file.tell())
+    file.write(bytes(12 + 16 * len(tags)))
+    return layout
+
+
+def _write_font_in_order(file: BinaryIO, font: TTFont) -> _FontLayout:
+    # the tables are placed in the order recommended by the specification, but compiled in the order of their dependencies,
+    # so a compiled table waits only until the tables placed before it are compiled
+    tags = _get_table_tags(font)
+    layout = _reserve_directory(file, font, tags)
+    placing_order = sortedTagList(tags)
+    placed_count = 0
+    pending_tables = {}
+    for tag, data in _iter_compiled_tables(font, tags):
+        pending_tables[tag] = data
+        while placed_count < len(placing_order) and placing_order[placed_count] in pending_tables:
+            placing_tag = placing_order[placed_count]
+            layout.tables[placing_tag] = _write_table(file, pending_tables.pop(placing_tag))
+            placed_count += 1
+    return layout
+
+
+def _write_font_with_table_cache(file: BinaryIO, font: TTFont, table_cache: dict[tuple[str, bytes], tuple[int, int]] | None) -> _FontLayout:
+    # only the digests of the written tables are kept for sharing, not the data
+    tags = _get_table_tags(font)
+    layout = _reserve_directory(file, font, tags)
+    for tag, data in _iter_compiled_tables(font, tags):
+        if table_cache is None:
+            layout.tables[tag] = _write_table(file, data)
+            continue
+        cache_key = tag, hashlib.sha256(data).digest()
+        table = table_cache.get(cache_key)
+        if table is None:
+            table = _write_table(file, data)
+            table_cache[cache_key] = table
+        layout.tables[tag] = table
+    return layout
+
+
+def _patch_directory(buffer: mmap.mmap, layout: _FontLayout):
+    # the checksums are calculated on the written tables, and 'head' is taken with 'checkSumAdjustment' as zero
+    checksums_sum = 0
+    directory = bytearray(struct.pack('>4sHHHH', layout.sfnt_version, len(layout.tables), *getSearchRange(len(layout.tables), 16)))
+    with memoryview(buffer) as view:
+        for tag, (offset, length) in sorted(layout.tables.items()):
+            checksum = calculate_checksum(view[offset:offset + (length + 3) // 4 * 4])
+            if tag == 'head':
+                checksum = (checksum - struct.unpack_from('>L', buffer, offset + 8)[0]) & 0xFFFFFFFF
+            checksums_sum += checksum
+            directory += struct.pack('>4sLLL', tag.encode('latin-1'), checksum, offset, length)
+    buffer[layout.directory_offset:layout.directory_offset + len(directory)] = directory
+    if 'head' in layout.tables:
+        checksum_adjustment = (_CHECKSUM_MAGIC - checksums_sum - calculate_checksum(directory)) & 0xFFFFFFFF
+        struct.pack_into('>L', buffer, layout.tables['head'][0] + 8, checksum_adjustment)
+
+
+def _patch_directories(file: BinaryIO, layouts: Iterable[_FontLayout]):
+    file.flush()
+    with mmap.mmap(file.fileno(), 0) as buffer:
+        for layout in layouts:
+            _patch_directory(buffer, layout)
+        buffer.flush()
+
+
+def save_font(font: TTFont, file_path: str | PathLike[str]):
+    """
+    Write an uncompressed font straight into the file, the same bytes as `TTFont.save`.
+
+    Every table is compiled, written and dropped in turn, then the table directory and 'checkSumAdjustment'
+    are patched through a memory map of the file, so the whole font is never held in memory.
+    """
+    if font.flavor is not None:
+        raise ValueError(f"a {repr(font.flavor)} font is compressed as a whole, save it with 'TTFont.save'")
+    with open(file_path, 'w+b') as file:
+        layout = _write_font_in_order(file, font)
+        _patch_directories(file, [layout])
+
+
+def save_collection(fonts: list[TTFont], file_path: str | PathLike[str], share_tables: bool = True):
+    """
+    Write a font collection straight into the file, the same bytes as `TTCollection.save`.
+
+    The identical tables are shared by their digests, so the memory needed stays near the size of the largest table.
+    """
+    with open(file_path, 'w+b') as file:
+        file.write(struct.pack('>4sLL', b'ttcf', 0x00010000, len(fonts)))
+        offsets_offset = file.tell()
+        file.write(bytes(4 * len(fonts)))
+        table_cache = {} if share_tables else None
+        layouts = []
+        for font in fonts:
+            if font.flavor is not None:
+                raise ValueError(f"a font collection can not contain a {repr(font.flavor)} font")
+            layouts.append(_write_font_with_table_cache(file, font, table_cache))
+        file.seek(offsets_offset)
+        file.write(struct.pack(f'>{len(layouts)}L', *[layout.directory_offset for layout in layouts]))
+        _patch_directories(file, layouts)
@@ -0,0 +1,165 @@
+import copy
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+
+import pixel_font_builder
+from pixel_font_builder import opentype
+from pixel_font_builder.glyph import Glyph
+
+
+class SplitFont:
+    """
+    One slice of a split font: the saved file, and the code points it covers.
+    """
+
+    file_path: Path
+    code_points: list[int]
+
+    def __init__(self, file_path: Path, code_points: list[int]):
+        self.file_path = file_path
+        self.code_points = code_points
+
+    @property
+    def unicode_range(self) -> str:
+        return create_unicode_range(self.code_points)
+
+
+def create_unicode_range(code_points: Iterable[int]) -> str:
+    """
+    The CSS `unicode-range` of the code points, consecutive code points joined into intervals.
+    """
+    intervals = []
+    for code_point in sorted(code_points):
+        if len(intervals) > 0 and intervals[-1][1] + 1 == code_point:
+            intervals[-1][1] = code_point
+        else:
+            intervals.append([code_point, code_point])
+    return ', '.join(f'U+{start:04X}' if start == end else f'U+{start:04X}-{end:04X}' for start, end in intervals)
+
+
+def partition_by_ranges(character_mapping: dict[int, str], ranges: list[tuple[int, int]]) -> list[dict[int, str]]:
+    """
+    One partition per range, both ends inclusive, in the order given. A code point goes to the first range containing it,
+    and the code points in no range go to a last partition. Empty partitions are dropped.
+    """
+    partitions = [{} for _ in range(len(ranges) + 1)]
+    for code_point, glyph_name in sorted(character_mapping.items()):
+        for index, (start, end) in enumerate(ranges):
+            if start <= code_point <= end:
+                partitions[index][code_point] = glyph_name
+                break
+        else:
+            partitions[-1][code_point] = glyph_name
+    return [partition for partition in partitions if len(partition) > 0]
+
+
+def partition_by_frequencies(character_mapping: dict[int, str], frequencies: dict[int, float], partition_size: int) -> list[dict[int, str]]:
+    """
+    Partitions of at most `partition_size` code points, the most frequently used ones first,
+    so that a typical page needs only the first few. Code points without a frequency come last, in code point order.
+    """
+    code_points = sorted(character_mapping, key=lambda code_point: (-frequencies.get(code_point, 0), code_point))
+    partitions = []
+    for i in range(0, len(code_points), partition_size):
+        partitions.append({code_point: character_mapping[code_point] for code_point in sorted(code_points[i:i + partition_size])})
+    return partitions
+
+
+def _create_slice_builder(
+        context: 'pixel_font_builder.FontBuilder',
+        character_mapping: dict[int, str],
+        glyph_order: list[str],
+        name_to_glyph: Mapping[str, Glyph],
+) -> 'pixel_font_builder.FontBuilder':
+    # the glyph objects are shared with the whole font, so are their cached outlines
+    builder = pixel_font_builder.FontBuilder()
+    builder.font_metric = context.font_metric
+    builder.meta_info = context.meta_info
+    # the glyphs are already merged in the whole font, a partition of the original mapping is mapped to the remaining glyphs
+    builder.character_mapping = {code_point: context.merged_glyph_names.get(glyph_name, glyph_name) for code_point, glyph_name in character_mapping.items()}
+    builder.deduplicate_glyphs = False
+    builder.merged_glyph_names = context.merged_glyph_names
+    glyph_names = set(builder.character_mapping.values())
+    builder.glyphs = [name_to_glyph[glyph_name] for glyph_name in glyph_order if glyph_name == '.notdef' or glyph_name in glyph_names]
+    # a feature file may refer to glyphs outside of the slice
+    builder.opentype_config = copy.copy(context.opentype_config)
+    builder.opentype_config.feature_files = []
+    builder.profiler = context.profiler
+    return builder
+
+
+def _save_slice(builder: 'pixel_font_builder.FontBuilder', file_path: Path, is_ttf: bool, flavor: opentype.Flavor | None):
+    if is_ttf:
+        builder.save_ttf(file_path, flavor)
+    else:
+        builder.save_otf(file_path, flavor)
+
+
+def _save_slice_in_worker(args: tuple['pixel_font_builder.FontBuilder', Path, bool, opentype.Flavor | None]):
+    _save_slice(*args)
+
+
+def _create_css(context: 'pixel_font_builder.FontBuilder', split_fonts: list[SplitFont], is_ttf: bool, flavor: opentype.Flavor | None) -> str:
+    # the fonts are next to the CSS file
+    if context.meta_info.family_name is None:
+        raise RuntimeError("missing meta info: 'family_name' is required for the '@font-face' rules")
+    font_format = flavor if flavor is not None else 'truetype' if is_ttf else 'opentype'
+    family_name = context.meta_info.family_name.replace("'", "\\'")
+    blocks = []
+    for split_font in split_fonts:
+        blocks.append(
+            '@font-face {\n'
+            f"  font-family: '{family_name}';\n"
+            f"  src: url('{split_font.file_path.name}') format('{font_format}');\n"
+            f'  unicode-range: {split_font.unicode_range};\n'
+            '}\n'
+        )
+    return '\n'.join(blocks)
+
+
+def save_split(
+        context: 'pixel_font_builder.FontBuilder',
+        dir_path: str | PathLike[str],
+        partitions: list[dict[int, str]],
+        file_name_prefix: str,
+        is_ttf: bool = False,
+        flavor: opentype.Flavor | None = opentype.Flavor.WOFF2,
+        css_file_name: str | None = 'fonts.css',
+        workers: int = 1,
+) -> list[SplitFont]:
+    """
+    Save every partition of the character mapping as a font with only the glyphs it needs,
+    named '{file_name_prefix}.{index}.{extension}', along with a CSS file of a `@font-face` rule with the `unicode-range` of each.
+
+    With more than one worker, the slices are saved in worker processes, which share the outlines through `opentype_config.cache`.
+    """
+    dir_path = Path(dir_path)
+    dir_path.mkdir(parents=True, exist_ok=True)
+    extension = flavor if flavor is not None else 'ttf' if is_ttf else 'otf'
+    with context.profiler.phase('prepare_glyphs'):
+        glyph_order, name_to_glyph, _ = context.prepare_glyphs()
+
+    split_fonts = []
+    tasks = []
+    for index, character_mapping in enumerate(partitions):
+        file_path = dir_path.joinpath(f'{file_name_prefix}.{index}.{extension}')
+        split_fonts.append(SplitFont(file_path, sorted(character_mapping)))
+        tasks.append((_create_slice_builder(context, character_mapping, glyph_order, name_to_glyph), file_path, is_ttf, flavor))
+    # created before saving, so that a font without a family name fails early
+    css = _create_css(context, split_fonts, is_ttf, flavor) if css_file_name is not None else None
+
+    if workers > 1 and len(tasks) > 1:
+        cache = context.opentype_config.cache
+        if cache is not None:
+            cache.flush()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_save_slice_in_worker, tasks))
+    else:
+        for task in tasks:
+            _save_slice(*task)
+
+    if css_file_name is not None:
+        dir_path.joinpath(css_file_name).write_text(css, 'utf-8')
+    return split_fonts
@@ -0,0 +1,34 @@
+import pickle
+from pathlib import Path
+
+from examples import demo
+from pixel_font_builder import FontBuilder, GlyphAtlas
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def test_atlas(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.save_bdf(tmp_path.joinpath('expected.bdf'))
+
+    for depth, index_file_name in ((1, 'index.json'), (8, 'index.csv')):
+        # an odd width, so that the glyphs are not aligned to bytes
+        GlyphAtlas.save(builder.glyphs, builder.character_mapping, tmp_path.joinpath('atlas.raw'), tmp_path.joinpath(index_file_name), 37, depth)
+        with GlyphAtlas.load(tmp_path.joinpath('atlas.raw'), tmp_path.joinpath(index_file_name), 37, depth) as atlas:
+            assert len(atlas) == len(builder.glyphs)
+            assert atlas.character_mapping == builder.character_mapping
+            for glyph, atlas_glyph in zip(builder.glyphs, atlas):
+                assert atlas_glyph.name == glyph.name
+                assert atlas_glyph.dimensions == glyph.dimensions
+                assert atlas_glyph.packed_bitmap == glyph.packed_bitmap
+            assert atlas[0] is atlas[0]
+            assert pickle.loads(pickle.dumps(atlas))[-1].packed_bitmap == atlas[-1].packed_bitmap
+
+            atlas_builder = _create_demo_builder()
+            atlas_builder.glyphs = atlas
+            atlas_builder.character_mapping = atlas.character_mapping
+            atlas_builder.save_bdf(tmp_path.joinpath('atlas.bdf'))
+            assert tmp_path.joinpath('atlas.bdf').read_bytes() == tmp_path.joinpath('expected.bdf').read_bytes()
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from examples import demo
+from pixel_font_builder import FontBuilder, Glyph
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def test_streaming_output_parity(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.glyphs.append(Glyph(name='wide', advance_width=13, bitmap=[[1] * 13, [0] * 12 + [1]]))
+    builder.character_mapping[0x1F600] = 'wide'
+    builder.glyphs.append(Glyph(name='blank', advance_width=4, bitmap=[]))
+    builder.character_mapping[0x2000] = 'blank'
+    for only_basic_plane in (False, True):
+        builder.bdf_config.only_basic_plane = only_basic_plane
+        builder.save_bdf(tmp_path.joinpath('expected.bdf'))
+        builder.save_bdf(tmp_path.joinpath('streaming.bdf'), streaming=True)
+        assert tmp_path.joinpath('streaming.bdf').read_bytes() == tmp_path.joinpath('expected.bdf').read_bytes()
+
+
+def test_streaming_zero_width_glyph(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.glyphs.append(Glyph(name='zero_width', advance_width=4, bitmap=[[], [], []]))
+    builder.character_mapping[0x2000] = 'zero_width'
+    builder.save_bdf(tmp_path.joinpath('streaming.bdf'), streaming=True)
+    text = tmp_path.joinpath('streaming.bdf').read_text('utf-8')
+    glyph_block = text[text.index('STARTCHAR zero_width\n'):]
+    assert glyph_block[:glyph_block.index('ENDCHAR\n')].endswith('BBX 0 3 0 0\nBITMAP\n\n\n\n')
@@ -0,0 +1,140 @@
+import json
+from pathlib import Path
+
+from fontTools.ttLib import TTFont
+
+from examples import demo
+from pixel_font_builder import BuildManifest, FontBuilder, Glyph, OutputFormat, opentype
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def _assert_same_font(file_path_1: Path, file_path_2: Path):
+    font_1 = TTFont(file_path_1)
+    font_2 = TTFont(file_path_2)
+    assert font_1.flavor == font_2.flavor
+    assert sorted(font_1.keys()) == sorted(font_2.keys())
+    for tag in font_1.keys():
+        if tag in ('GlyphOrder', 'head'):
+            continue
+        assert font_1.getTableData(tag) == font_2.getTableData(tag), tag
+
+
+def test_save_all(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.save_all({tmp_path.joinpath(f'all.{output_format}'): output_format for output_format in OutputFormat})
+
+    builder.save_otf(tmp_path.joinpath('single.otf'))
+    builder.save_otf(tmp_path.joinpath('single.otf.woff'), flavor=opentype.Flavor.WOFF)
+    builder.save_otf(tmp_path.joinpath('single.otf.woff2'), flavor=opentype.Flavor.WOFF2)
+    builder.save_ttf(tmp_path.joinpath('single.ttf'))
+    builder.save_ttf(tmp_path.joinpath('single.ttf.woff'), flavor=opentype.Flavor.WOFF)
+    builder.save_ttf(tmp_path.joinpath('single.ttf.woff2'), flavor=opentype.Flavor.WOFF2)
+    builder.save_bdf(tmp_path.joinpath('single.bdf'))
+    builder.save_pcf(tmp_path.joinpath('single.pcf'))
+
+    for output_format in OutputFormat:
+        file_path_1 = tmp_path.joinpath(f'all.{output_format}')
+        file_path_2 = tmp_path.joinpath(f'single.{output_format}')
+        if output_format in (OutputFormat.BDF, OutputFormat.PCF):
+            assert file_path_1.read_bytes() == file_path_2.read_bytes()
+        else:
+            _assert_same_font(file_path_1, file_path_2)
+
+
+def test_save_all_with_manifest(tmp_path: Path):
+    outputs = {tmp_path.joinpath(f'demo.{output_format}'): output_format for output_format in (OutputFormat.OTF, OutputFormat.TTF, OutputFormat.BDF)}
+
+    with BuildManifest(tmp_path.joinpath('manifest')) as manifest:
+        builder = _create_demo_builder()
+        report = builder.save_all(outputs, manifest)
+        assert report.reused_count == 0
+        assert report.recompiled_count == len(builder.glyphs)
+        expected = {file_path: file_path.read_bytes() for file_path in outputs}
+    manifest_data = json.loads(tmp_path.joinpath('manifest', 'manifest.json').read_text('utf-8'))
+    assert sorted(manifest_data['glyphs']) == sorted(glyph.name for glyph in builder.glyphs)
+
+    with BuildManifest(tmp_path.joinpath('manifest')) as manifest:
+        builder = _create_demo_builder()
+        report = builder.save_all(outputs, manifest)
+        assert report.reused_count == len(builder.glyphs)
+        assert report.recompiled_count == 0
+        assert manifest.cache.misses == 0
+        assert tmp_path.joinpath('demo.bdf').read_bytes() == expected[tmp_path.joinpath('demo.bdf')]
+
+        builder = _create_demo_builder()
+        glyph = builder.glyphs[1]
+        glyph.advance_width += 1
+        removed_glyph = builder.glyphs.pop()
+        builder.character_mapping = {code_point: glyph_name for code_point, glyph_name in builder.character_mapping.items() if glyph_name != removed_glyph.name}
+        report = builder.save_all(outputs, manifest)
+        assert report.recompiled_glyph_names == [glyph.name]
+        assert report.reused_count == len(builder.glyphs) - 1
+        assert report.removed_glyph_names == [removed_glyph.name]
+
+        # a renamed glyph has the same content, so its outlines are still served from the cache
+        builder = _create_demo_builder()
+        glyph = builder.glyphs[1]
+        builder.character_mapping = {code_point: 'renamed' if glyph_name == glyph.name else glyph_name for code_point, glyph_name in builder.character_mapping.items()}
+        glyph.name = 'renamed'
+        report = builder.save_all(outputs, manifest)
+        assert report.recompiled_count == 0
+        assert 'renamed' in report.reused_glyph_names
+
+        # the cache keys include the config, so a config change recompiles every glyph
+        builder = _create_demo_builder()
+        builder.opentype_config.px_to_units = 50
+        report = builder.save_all(outputs, manifest)
+        assert report.reused_count == 0
+        assert report.recompiled_count == len(builder.glyphs)
+
+
+def test_save_all_in_parallel(tmp_path: Path):
+    builder = _create_demo_builder()
+    serial_dir = tmp_path.joinpath('serial')
+    serial_dir.mkdir()
+    serial_report = builder.save_all({serial_dir.joinpath(f'demo.{output_format}'): output_format for output_format in OutputFormat})
+    parallel_dir = tmp_path.joinpath('parallel')
+    parallel_dir.mkdir()
+    parallel_report = builder.save_all({parallel_dir.joinpath(f'demo.{output_format}'): output_format for output_format in OutputFormat}, workers=3)
+
+    assert parallel_report.stage_timings.keys() == {stage_name.replace('serial', 'parallel') for stage_name in serial_report.stage_timings}
+    assert 'compile otf' in parallel_report.stage_timings
+    for output_format in OutputFormat:
+        file_path_1 = serial_dir.joinpath(f'demo.{output_format}')
+        file_path_2 = parallel_dir.joinpath(f'demo.{output_format}')
+        if output_format in (OutputFormat.BDF, OutputFormat.PCF):
+            assert file_path_1.read_bytes() == file_path_2.read_bytes()
+        else:
+            _assert_same_font(file_path_1, file_path_2)
+
+
+def test_deduplicate_glyphs(tmp_path: Path):
+    builder = _create_demo_builder()
+    glyph = builder.glyphs[-1]
+    builder.glyphs.append(Glyph(
+        name='copy',
+        horizontal_origin=glyph.horizontal_origin,
+        advance_width=glyph.advance_width,
+        vertical_origin=glyph.vertical_origin,
+        advance_height=glyph.advance_height,
+        bitmap=glyph.bitmap,
+    ))
+    builder.character_mapping[0x4E00] = 'copy'
+    builder.deduplicate_glyphs = True
+    report = builder.save_all({tmp_path.joinpath('deduplicated.otf'): OutputFormat.OTF, tmp_path.joinpath('deduplicated.pcf'): OutputFormat.PCF})
+    assert report.merged_glyph_names == {'copy': glyph.name}
+    assert builder.character_mapping[0x4E00] == 'copy'
+    glyph_order, _, _ = builder.prepare_glyphs()
+    assert 'copy' not in glyph_order
+    assert builder.character_mapping[0x4E00] == 'copy'
+    shared_tables_key = opentype._create_shared_tables_key(builder, False, opentype.Family.PIXEL)
+    builder.deduplicate_glyphs = False
+    assert opentype._create_shared_tables_key(builder, False, opentype.Family.PIXEL) != shared_tables_key
+
+    font = TTFont(tmp_path.joinpath('deduplicated.otf'))
+    assert 'copy' not in font.getGlyphOrder()
+    assert font.getBestCmap()[0x4E00] == glyph.name
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from pixel_font_builder.cache import GlyphCache
+
+
+def test_hits_and_misses(tmp_path: Path):
+    with GlyphCache(tmp_path.joinpath('cache.sqlite')) as cache:
+        assert cache.get(b'a') is None
+        cache.put(b'a', b'value')
+        assert cache.get(b'a') == b'value'
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+
+def test_persistence(tmp_path: Path):
+    file_path = tmp_path.joinpath('cache.sqlite')
+    with GlyphCache(file_path) as cache:
+        cache.put(b'a', b'value')
+    with GlyphCache(file_path) as cache:
+        assert cache.get(b'a') == b'value'
+        assert cache.total_size == 5
+
+
+def test_lru_eviction(tmp_path: Path):
+    with GlyphCache(tmp_path.joinpath('cache.sqlite'), max_size=8) as cache:
+        cache.put(b'a', b'1234')
+        cache.put(b'b', b'1234')
+        assert cache.get(b'a') == b'1234'
+        cache.put(b'c', b'1234')
+        assert b'a' in cache
+        assert b'b' not in cache
+        assert b'c' in cache
+        assert cache.total_size == 8
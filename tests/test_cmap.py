@@ -0,0 +1,11 @@
+from pixel_font_builder.cmap import CodePointIndex
+
+
+def test_code_point_index():
+    index = CodePointIndex({0x1F600: 'emoji', 0x43: 'C', 0x41: 'A', 0x42: 'B', 0xFFFE: 'A'})
+    assert list(index.code_points) == [0x41, 0x42, 0x43, 0xFFFE, 0x1F600]
+    assert index.basic_plane_count == 4
+    assert list(index.to_dict().items()) == [(0x41, 'A'), (0x42, 'B'), (0x43, 'C'), (0xFFFE, 'A'), (0x1F600, 'emoji')]
+    assert list(index.items(only_basic_plane=True)) == [(0x41, 'A'), (0x42, 'B'), (0x43, 'C'), (0xFFFE, 'A')]
+    assert list(index.items(default_char=0xFFFE)) == [(0x41, 'A'), (0x42, 'B'), (0x43, 'C'), (0xFFFE, '.notdef'), (0x1F600, 'emoji')]
+    assert list(index.items(default_char=0x40))[0] == (0x40, '.notdef')
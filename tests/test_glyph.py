@@ -0,0 +1,59 @@
+import pytest
+
+from pixel_font_builder import Glyph
+
+
+def test_packed_bitmap():
+    bitmap = [
+        [0, 1, 1, 0, 0, 0, 0, 0, 1],
+        [1, 0, 0, 0, 0, 0, 0, 0, 0],
+    ]
+    glyph = Glyph(name='A', bitmap=bitmap)
+    assert glyph.dimensions == (9, 2)
+    assert glyph.packed_bitmap == bytes([0b01100000, 0b10000000, 0b10000000, 0b00000000])
+    assert glyph.bitmap_row_masks == [0b011000001, 0b100000000]
+    assert glyph.bitmap == bitmap
+    assert list(glyph.lazy_bitmap) == bitmap
+
+    revision = glyph.revision
+    glyph.set_packed_bitmap(bytes([0b11000000]), 2, 1)
+    assert glyph.revision > revision
+    assert glyph.bitmap == [[1, 1]]
+
+
+def test_read_only_bitmap():
+    glyph = Glyph(name='A', bitmap=[[0, 1], [1, 0]])
+    assert glyph.bitmap is glyph.bitmap
+    with pytest.raises(TypeError):
+        glyph.bitmap[0][0] = 1
+    with pytest.raises(TypeError):
+        glyph.bitmap.append([1, 1])
+    assert glyph.bitmap == [[0, 1], [1, 0]]
+
+    bitmap = [list(row) for row in glyph.bitmap]
+    bitmap[0][0] = 1
+    glyph.bitmap = bitmap
+    assert glyph.bitmap == [[1, 1], [1, 0]]
+
+
+def test_empty_bitmap():
+    glyph = Glyph(name='.notdef')
+    assert glyph.dimensions == (0, 0)
+    assert glyph.bitmap == []
+    assert glyph.calculate_bitmap_left_padding() == 0
+    assert glyph.calculate_bitmap_top_padding() == 0
+
+
+def test_ink_box():
+    glyph = Glyph(name='A', bitmap=[
+        [0, 0, 0, 0, 0],
+        [0, 0, 1, 0, 0],
+        [0, 1, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+    ])
+    assert glyph.calculate_bitmap_ink_box() == (1, 1, 3, 3)
+    assert glyph.calculate_bitmap_left_padding() == 1
+    assert glyph.calculate_bitmap_top_padding() == 1
+    glyph.bitmap = [[0, 0], [0, 0]]
+    assert glyph.calculate_bitmap_ink_box() is None
+    assert glyph.calculate_bitmap_left_padding() == 0
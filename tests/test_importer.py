@@ -0,0 +1,53 @@
+import os
+import shutil
+from pathlib import Path
+
+from examples import glyphs_dir
+from examples.demo import _load_bitmap_from_png
+from pixel_font_builder import Glyph, PngImporter
+
+
+def test_load_dir():
+    bitmaps = PngImporter().load_dir(glyphs_dir)
+    assert len(bitmaps) > 0
+    for file_path, imported_bitmap in bitmaps.items():
+        bitmap, width, height = _load_bitmap_from_png(file_path)
+        assert (imported_bitmap.width, imported_bitmap.height) == (width, height)
+        assert imported_bitmap.packed_bitmap == Glyph(name='A', bitmap=bitmap).packed_bitmap
+        assert imported_bitmap.bitmap == bitmap
+
+
+def test_load_dir_in_parallel():
+    bitmaps_1 = PngImporter().load_dir(glyphs_dir)
+    bitmaps_2 = PngImporter(workers=2).load_dir(glyphs_dir)
+    assert list(bitmaps_1) == list(bitmaps_2)
+    for file_path, imported_bitmap in bitmaps_1.items():
+        assert bitmaps_2[file_path].packed_bitmap == imported_bitmap.packed_bitmap
+
+
+def test_index(tmp_path: Path):
+    dir_path = tmp_path.joinpath('glyphs')
+    shutil.copytree(glyphs_dir, dir_path)
+    index_file_path = tmp_path.joinpath('index.json')
+
+    importer = PngImporter(index_file_path)
+    bitmaps = importer.load_dir(dir_path)
+    assert len(importer.decoded_file_paths) == len(bitmaps)
+    assert len(importer.reused_file_paths) == 0
+
+    importer = PngImporter(index_file_path)
+    assert importer.load_dir(dir_path).keys() == bitmaps.keys()
+    assert len(importer.decoded_file_paths) == 0
+    assert len(importer.reused_file_paths) == len(bitmaps)
+    for file_path, imported_bitmap in importer.load_dir(dir_path).items():
+        assert imported_bitmap.packed_bitmap == bitmaps[file_path].packed_bitmap
+
+    changed_file_path, other_file_path = list(bitmaps)[:2]
+    shutil.copyfile(other_file_path, changed_file_path)
+    stat = os.stat(changed_file_path)
+    os.utime(changed_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_bitmaps = importer.load_dir(dir_path)
+    assert importer.decoded_file_paths == [changed_file_path]
+    assert new_bitmaps[changed_file_path].packed_bitmap == bitmaps[other_file_path].packed_bitmap
+
+    assert len(PngImporter(index_file_path, alpha_threshold=0).load_dir(dir_path)) == len(bitmaps)
@@ -0,0 +1,244 @@
+from io import BytesIO
+from pathlib import Path
+
+import fontTools.fontBuilder
+import pytest
+from fontTools.misc import timeTools
+from fontTools.pens.recordingPen import DecomposingRecordingPen
+from fontTools.ttLib import TTCollection, TTFont
+
+from examples import glyphs_dir, demo
+from examples.demo import _load_bitmap_from_png
+from pixel_font_builder import FontBuilder, FontCollectionBuilder, Glyph, opentype
+from pixel_font_builder.cache import GlyphCache
+
+
+def _normalize_outlines(outlines: list[list[tuple[int, int]]]) -> list[tuple[tuple[int, int], ...]]:
+    # 轮廓的起点和先后顺序不影响字形，只比较多边形本身及其绘制方向
+    normalized = []
+    for outline in outlines:
+        start_index = outline.index(min(outline))
+        normalized.append(tuple(outline[start_index:] + outline[:start_index]))
+    normalized.sort()
+    return normalized
+
+
+def _assert_outlines_parity(bitmap: list[list[int]]):
+    glyph = Glyph(name='test', bitmap=bitmap)
+    legacy_outlines = opentype._create_outlines_with_engine(glyph.bitmap_row_masks, glyph.width, 100, opentype.OutlineEngine.LEGACY)
+    trace_outlines = opentype._create_outlines_with_engine(glyph.bitmap_row_masks, glyph.width, 100, opentype.OutlineEngine.TRACE)
+    assert _normalize_outlines(legacy_outlines) == _normalize_outlines(trace_outlines)
+    numpy_outlines = opentype._create_outlines_with_engine(glyph.bitmap_row_masks, glyph.width, 100, opentype.OutlineEngine.NUMPY)
+    assert _normalize_outlines(numpy_outlines) == _normalize_outlines(trace_outlines)
+
+
+def test_outline_engines_parity_on_assets():
+    for file_path in glyphs_dir.iterdir():
+        if file_path.suffix != '.png':
+            continue
+        bitmap, _, _ = _load_bitmap_from_png(file_path)
+        _assert_outlines_parity(bitmap)
+
+
+def test_outline_engines_parity_on_diagonal_joints():
+    _assert_outlines_parity([
+        [1, 1, 1],
+        [1, 0, 1],
+        [1, 1, 0],
+    ])
+    _assert_outlines_parity([
+        [1, 0, 1],
+        [0, 1, 0],
+        [1, 0, 1],
+    ])
+    _assert_outlines_parity([
+        [1, 1, 1, 1],
+        [1, 0, 1, 1],
+        [1, 1, 0, 1],
+        [1, 1, 1, 1],
+    ])
+    _assert_outlines_parity([])
+
+
+def _create_demo_builder(**config_kwargs) -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    builder = demo._create_builder({}, character_mapping, glyph_files)
+    for key, value in config_kwargs.items():
+        setattr(builder.opentype_config, key, value)
+    return builder
+
+
+def _save_to_bytes(font_builder: fontTools.fontBuilder.FontBuilder) -> bytes:
+    stream = BytesIO()
+    font_builder.save(stream)
+    return stream.getvalue()
+
+
+def test_parallel_workers_output_parity():
+    for family in opentype.Family:
+        for is_ttf in (False, True):
+            serial_builder = opentype.create_builder(_create_demo_builder(), is_ttf, family)
+            parallel_builder = opentype.create_builder(_create_demo_builder(workers=2), is_ttf, family)
+            assert _save_to_bytes(serial_builder) == _save_to_bytes(parallel_builder)
+
+
+def test_numpy_outlines_in_batches():
+    pytest.importorskip('numpy')
+    for is_ttf in (False, True):
+        # the batches are only made in a serial build, the workers create the outlines one glyph at a time
+        batch_builder = opentype.create_builder(_create_demo_builder(outline_engine=opentype.OutlineEngine.NUMPY), is_ttf, opentype.Family.PIXEL)
+        single_builder = opentype.create_builder(_create_demo_builder(outline_engine=opentype.OutlineEngine.NUMPY, workers=2), is_ttf, opentype.Family.PIXEL)
+        assert _save_to_bytes(batch_builder) == _save_to_bytes(single_builder)
+
+
+def test_numpy_outlines_fallback(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(opentype, '_load_numpy_outlines', lambda: None)
+    for is_ttf in (False, True):
+        numpy_builder = opentype.create_builder(_create_demo_builder(outline_engine=opentype.OutlineEngine.NUMPY), is_ttf, opentype.Family.PIXEL)
+        trace_builder = opentype.create_builder(_create_demo_builder(outline_engine=opentype.OutlineEngine.TRACE), is_ttf, opentype.Family.PIXEL)
+        assert _save_to_bytes(numpy_builder) == _save_to_bytes(trace_builder)
+
+
+def test_persistent_cache_output_parity(tmp_path: Path):
+    for family in opentype.Family:
+        for is_ttf in (False, True):
+            expected = _save_to_bytes(opentype.create_builder(_create_demo_builder(), is_ttf, family))
+            with GlyphCache(tmp_path.joinpath(f'cache-{family}-{is_ttf}.sqlite')) as cache:
+                cold_builder = opentype.create_builder(_create_demo_builder(cache=cache), is_ttf, family)
+                assert _save_to_bytes(cold_builder) == expected
+                assert cache.hits == 0
+                warm_builder = opentype.create_builder(_create_demo_builder(cache=cache), is_ttf, family)
+                assert _save_to_bytes(warm_builder) == expected
+                assert cache.hits == cache.misses
+
+
+def test_glyph_cache_invalidation():
+    glyph = Glyph(name='A', advance_width=2, bitmap=[[1, 0], [0, 0]])
+    for family in opentype.Family:
+        xtf_glyph = opentype._get_glyph_with_cache(glyph, 100, False, family)
+        assert opentype._get_glyph_with_cache(glyph, 100, False, family) is xtf_glyph
+        assert opentype._get_glyph_with_cache(glyph, 50, False, family) is not xtf_glyph
+    pixel_glyph = opentype._get_glyph_with_cache(glyph, 100, False, opentype.Family.PIXEL)
+    glyph.bitmap = [[1, 1], [0, 0]]
+    assert opentype._get_glyph_with_cache(glyph, 100, False, opentype.Family.PIXEL) is not pixel_glyph
+
+
+def _record_outlines(font: TTFont) -> dict[str, list]:
+    glyph_set = font.getGlyphSet()
+    outlines = {}
+    for glyph_name in font.getGlyphOrder():
+        pen = DecomposingRecordingPen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        outlines[glyph_name] = pen.value
+    return outlines
+
+
+def test_templated_dots_output_parity():
+    # an odd 'px_to_units' puts the dot centres on half units
+    for px_to_units in (100, 7, 15, 25, 33):
+        for is_ttf in (False, True):
+            separate_builder = opentype.create_builder(_create_demo_builder(px_to_units=px_to_units), is_ttf)
+            template_builder = opentype.create_builder(_create_demo_builder(px_to_units=px_to_units, dot_mode=opentype.DotMode.TEMPLATE), is_ttf)
+            assert _save_to_bytes(separate_builder) == _save_to_bytes(template_builder), (px_to_units, is_ttf)
+
+
+def test_composite_dots_outline_parity():
+    for px_to_units in (100, 7, 15, 25, 33):
+        for is_ttf in (False, True):
+            separate_font = TTFont(BytesIO(_save_to_bytes(opentype.create_builder(_create_demo_builder(px_to_units=px_to_units), is_ttf))))
+            composite_font = TTFont(BytesIO(_save_to_bytes(opentype.create_builder(_create_demo_builder(px_to_units=px_to_units, dot_mode=opentype.DotMode.COMPOSITE), is_ttf))))
+            composite_outlines = _record_outlines(composite_font)
+            for glyph_name, outline in _record_outlines(separate_font).items():
+                assert composite_outlines[glyph_name] == outline, (px_to_units, is_ttf, glyph_name)
+
+
+def test_merged_dots():
+    pytest.importorskip('pathops')
+    for is_ttf in (False, True):
+        separate_stats = opentype.calculate_outline_stats(opentype.create_builder(_create_demo_builder(), is_ttf).font)
+        merged_stats = opentype.calculate_outline_stats(opentype.create_builder(_create_demo_builder(dot_mode=opentype.DotMode.MERGED), is_ttf).font)
+        assert merged_stats.glyphs_count == separate_stats.glyphs_count
+        assert merged_stats.contours_count < separate_stats.contours_count
+
+
+def test_composite_dots():
+    separate_builder = opentype.create_builder(_create_demo_builder(), True)
+    composite_builder = opentype.create_builder(_create_demo_builder(dot_mode=opentype.DotMode.COMPOSITE), True)
+    composite_font = TTFont(BytesIO(_save_to_bytes(composite_builder)))
+    assert composite_font.getGlyphOrder()[-1] == '.dot'
+    assert composite_font['glyf']['0041'].isComposite()
+
+    separate_stats = opentype.calculate_outline_stats(separate_builder.font)
+    composite_stats = opentype.calculate_outline_stats(composite_font)
+    assert composite_stats.glyphs_count == separate_stats.glyphs_count + 1
+    assert composite_stats.contours_count == separate_stats.contours_count + 1
+
+    # CFF has no components, the dot is a local subroutine instead
+    separate_builder = opentype.create_builder(_create_demo_builder(), False)
+    otf_builder = opentype.create_builder(_create_demo_builder(dot_mode=opentype.DotMode.COMPOSITE), False)
+    otf_font = TTFont(BytesIO(_save_to_bytes(otf_builder)))
+    assert len(otf_font['CFF '].cff.topDictIndex[0].Private.Subrs) == 1
+    assert otf_font.getGlyphOrder() == separate_builder.font.getGlyphOrder()
+
+    separate_stats = opentype.calculate_outline_stats(separate_builder.font)
+    otf_stats = opentype.calculate_outline_stats(otf_font)
+    assert otf_stats.contours_count == separate_stats.contours_count
+    assert otf_stats.points_count == separate_stats.points_count
+    assert len(_save_to_bytes(otf_builder)) < len(_save_to_bytes(separate_builder))
+
+
+def test_subroutinize():
+    pytest.importorskip('cffsubr')
+    separate_builder = opentype.create_builder(_create_demo_builder(), False)
+    subroutinized_builder = opentype.create_builder(_create_demo_builder(subroutinize=True), False)
+    subroutinized_font = TTFont(BytesIO(_save_to_bytes(subroutinized_builder)))
+    separate_stats = opentype.calculate_outline_stats(separate_builder.font)
+    subroutinized_stats = opentype.calculate_outline_stats(subroutinized_font)
+    assert subroutinized_stats.contours_count == separate_stats.contours_count
+    assert len(_save_to_bytes(subroutinized_builder)) < len(_save_to_bytes(separate_builder))
+
+
+def test_collection_shared_tables():
+    glyph_pool = {}
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    collection_builder = FontCollectionBuilder()
+    for index in range(3):
+        collection_builder.append(demo._create_builder(glyph_pool, character_mapping, glyph_files, index))
+    for is_ttf in (False, True):
+        stream = BytesIO()
+        opentype.create_collection_builder(collection_builder, is_ttf).save(stream)
+        collection = TTCollection(BytesIO(stream.getvalue()))
+        assert len(collection.fonts) == len(collection_builder)
+        for font, context in zip(collection.fonts, collection_builder):
+            expected_font = TTFont(BytesIO(_save_to_bytes(opentype.create_builder(context, is_ttf))))
+            assert sorted(font.keys()) == sorted(expected_font.keys())
+            for tag in font.keys():
+                if tag == 'GlyphOrder':
+                    continue
+                data = font.getTableData(tag)
+                expected_data = expected_font.getTableData(tag)
+                if tag == 'head':
+                    # 'checkSumAdjustment' depends on the whole file
+                    data = data[:8] + data[12:]
+                    expected_data = expected_data[:8] + expected_data[12:]
+                assert data == expected_data, tag
+            assert font['name'].getDebugName(1) == context.meta_info.family_name
+
+
+def test_collection_member_times():
+    glyph_pool = {}
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    collection_builder = FontCollectionBuilder()
+    for index in range(2):
+        collection_builder.append(demo._create_builder(glyph_pool, character_mapping, glyph_files, index))
+    collection_builder[1].meta_info.created_time = None
+    collection_builder[1].meta_info.modified_time = None
+    configured_time = timeTools.timestampSinceEpoch(collection_builder[0].meta_info.modified_time.timestamp())
+    for is_ttf in (False, True):
+        stream = BytesIO()
+        opentype.create_collection_builder(collection_builder, is_ttf).save(stream)
+        collection = TTCollection(BytesIO(stream.getvalue()))
+        assert collection.fonts[0]['head'].created == configured_time
+        assert collection.fonts[0]['head'].modified == configured_time
+        assert collection.fonts[1]['head'].created > configured_time
+        assert collection.fonts[1]['head'].modified > configured_time
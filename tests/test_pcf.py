@@ -0,0 +1,65 @@
+import itertools
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from pcffont import PcfGlyph
+from pcffont.internal.buffer import Buffer
+from pcffont.t_bitmaps import PcfBitmaps
+
+from examples import demo
+from pixel_font_builder import Glyph, pcf
+from pixel_font_builder.pcf import _GlyphBackedPcfGlyph
+
+
+def test_ink_metric_parity():
+    bitmaps = [
+        [],
+        [[0, 0], [0, 0]],
+        [[0, 0, 0], [0, 1, 0], [0, 0, 0]],
+        [[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 1, 0]],
+        [[0, 0, 0, 1], [0, 0, 0, 0], [1, 0, 0, 0], [0, 0, 0, 0]],
+    ]
+    for bitmap in bitmaps:
+        glyph = Glyph(name='A', horizontal_origin=(1, -2), advance_width=5, bitmap=bitmap)
+        expected = PcfGlyph(
+            name=glyph.name,
+            encoding=0x41,
+            character_width=glyph.advance_width,
+            dimensions=glyph.dimensions,
+            origin=glyph.horizontal_origin,
+            bitmap=glyph.bitmap,
+        ).create_metric(True)
+        assert _GlyphBackedPcfGlyph(glyph, 0x41).create_metric(True) == expected
+
+
+def test_packed_bitmaps_output_parity():
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    builder = demo._create_builder({}, character_mapping, glyph_files)
+    builder.glyphs.append(Glyph(name='wide', advance_width=21, bitmap=[[1] * 21, [0] * 20 + [1], [1, 0] * 10 + [1]]))
+    builder.character_mapping[0x4E00] = 'wide'
+    for ms_byte_first, ms_bit_first, glyph_pad_index, scan_unit_index in itertools.product((False, True), (False, True), range(4), range(4)):
+        if scan_unit_index > glyph_pad_index:
+            continue
+        builder.pcf_config.ms_byte_first = ms_byte_first
+        builder.pcf_config.ms_bit_first = ms_bit_first
+        builder.pcf_config.glyph_pad_index = glyph_pad_index
+        builder.pcf_config.scan_unit_index = scan_unit_index
+        font = pcf.create_builder(builder).build()
+        assert isinstance(font.bitmaps, pcf._PackedPcfBitmaps)
+
+        stream = BytesIO()
+        font.bitmaps.dump(Buffer(stream), font, 0)
+        expected_stream = BytesIO()
+        PcfBitmaps(font.bitmaps.table_format, list(font.bitmaps)).dump(Buffer(expected_stream), font, 0)
+        assert stream.getvalue() == expected_stream.getvalue()
+
+
+def test_packed_bitmaps_fallback(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    builder = demo._create_builder({}, character_mapping, glyph_files)
+    builder.save_pcf(tmp_path.joinpath('packed.pcf'))
+    monkeypatch.setattr(pcf, '_PACKED_BITMAPS_SUPPORTED', False)
+    assert not isinstance(pcf.create_builder(builder).build().bitmaps, pcf._PackedPcfBitmaps)
+    builder.save_pcf(tmp_path.joinpath('fallback.pcf'))
+    assert tmp_path.joinpath('fallback.pcf').read_bytes() == tmp_path.joinpath('packed.pcf').read_bytes()
@@ -0,0 +1,67 @@
+import json
+import pstats
+from pathlib import Path
+
+from examples import demo
+from pixel_font_builder import FontBuilder, OutputFormat, opentype
+from pixel_font_builder.profiling import Profiler
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def test_disabled_by_default(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.save_otf(tmp_path.joinpath('demo.otf'))
+    assert builder.profiler.to_dict() == {'phases': {}, 'counters': {}}
+
+
+def test_phases_and_counters(tmp_path: Path):
+    phase_names = []
+    builder = _create_demo_builder()
+    builder.profiler = Profiler(callback=lambda name, seconds: phase_names.append(name), cprofile=True)
+    builder.opentype_config.dot_mode = opentype.DotMode.TEMPLATE
+    builder.save_otf(tmp_path.joinpath('demo.otf'))
+    builder.save_otf(tmp_path.joinpath('demo.otf'))
+    builder.save_pcf(tmp_path.joinpath('demo.pcf'))
+
+    report = builder.profiler.to_dict()
+    for name in ('prepare_glyphs', 'opentype.glyphs', 'opentype.setup_outlines', 'opentype.setup_tables', 'opentype.save', 'pcf.save'):
+        assert name in report['phases']
+        assert name in phase_names
+    assert report['phases']['opentype.save']['calls'] == 2
+    assert report['counters']['opentype.glyphs_compiled'] == len(builder.glyphs)
+    assert report['counters']['opentype.glyph_cache_hits'] == len(builder.glyphs)
+    assert report['counters']['opentype.dots'] > 0
+
+    builder.profiler.save_json(tmp_path.joinpath('report.json'))
+    assert json.loads(tmp_path.joinpath('report.json').read_text('utf-8')) == report
+    builder.profiler.save_pstats(tmp_path.joinpath('report.pstats'))
+    assert pstats.Stats(str(tmp_path.joinpath('report.pstats'))).total_calls > 0
+
+
+def test_merged_from_workers(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.profiler = Profiler()
+    builder.save_all({
+        tmp_path.joinpath('demo.otf'): OutputFormat.OTF,
+        tmp_path.joinpath('demo.pcf'): OutputFormat.PCF,
+    }, workers=2)
+    report = builder.profiler.to_dict()
+    assert report['counters']['opentype.glyphs_compiled'] == len(builder.glyphs)
+    assert 'opentype.compile' in report['phases']
+    assert 'pcf.save' in report['phases']
+
+
+def test_outline_stats(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.profiler = Profiler()
+    builder.opentype_config.dot_mode = opentype.DotMode.COMPOSITE
+    font = opentype.create_builder(builder, False).font
+    stats = opentype.calculate_outline_stats(font)
+    report = builder.profiler.to_dict()
+    assert 'opentype.outline_stats' in report['phases']
+    assert report['counters']['opentype.output_contours'] == stats.contours_count
+    assert report['counters']['opentype.output_points'] == stats.points_count
@@ -0,0 +1,47 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from examples import demo
+from pixel_font_builder import FontBuilder, Glyph, GlyphProvider, OutputFormat
+
+
+class _CopyingProvider:
+    def __init__(self, glyphs: list[Glyph]):
+        self.name_to_data = {glyph.name: pickle.dumps(glyph) for glyph in glyphs}
+        self.loads_count = 0
+
+    def get_glyph_names(self) -> list[str]:
+        return list(self.name_to_data)
+
+    def load_glyph(self, glyph_name: str) -> Glyph:
+        self.loads_count += 1
+        return pickle.loads(self.name_to_data[glyph_name])
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def test_provider(tmp_path: Path):
+    builder = _create_demo_builder()
+    outputs = [OutputFormat.OTF, OutputFormat.TTF, OutputFormat.BDF, OutputFormat.PCF]
+    builder.save_all({tmp_path.joinpath(f'expected.{output_format}'): output_format for output_format in outputs})
+
+    provider = _CopyingProvider(builder.glyphs)
+    assert isinstance(provider, GlyphProvider)
+    builder.glyphs = provider
+    builder.save_all({tmp_path.joinpath(f'provided.{output_format}'): output_format for output_format in outputs})
+    assert provider.loads_count > 0
+    for output_format in outputs:
+        assert tmp_path.joinpath(f'provided.{output_format}').read_bytes() == tmp_path.joinpath(f'expected.{output_format}').read_bytes()
+
+
+def test_provider_duplicate_glyphs():
+    builder = _create_demo_builder()
+    builder.glyphs = _CopyingProvider(builder.glyphs)
+    builder.glyphs.get_glyph_names = lambda: ['.notdef', 'A', 'A']
+    with pytest.raises(RuntimeError, match='duplicate glyphs'):
+        builder.prepare_glyphs()
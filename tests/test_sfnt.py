@@ -0,0 +1,57 @@
+from io import BytesIO
+from pathlib import Path
+
+from fontTools.ttLib import TTCollection
+from fontTools.ttLib.sfnt import calcChecksum
+
+from examples import demo
+from pixel_font_builder import FontBuilder, FontCollectionBuilder, opentype, sfnt
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def test_calculate_checksum():
+    for data in (b'', b'abcd', b'abcdxyz', bytes(range(256)) * 600 + b'\1'):
+        assert sfnt.calculate_checksum(data) == calcChecksum(data)
+
+
+def test_save_font(tmp_path: Path):
+    builder = _create_demo_builder()
+    for is_ttf in (False, True):
+        font = opentype.create_builder(builder, is_ttf).font
+        stream = BytesIO()
+        font.save(stream)
+        file_path = tmp_path.joinpath('demo.ttf' if is_ttf else 'demo.otf')
+        sfnt.save_font(font, file_path)
+        assert file_path.read_bytes() == stream.getvalue()
+
+
+def test_save_collection(tmp_path: Path):
+    glyph_pool = {}
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    collection_builder = FontCollectionBuilder()
+    for index in range(3):
+        collection_builder.append(demo._create_builder(glyph_pool, character_mapping, glyph_files, index))
+    for is_ttf in (False, True):
+        fonts = opentype.create_collection_builder(collection_builder, is_ttf).fonts
+        for font in fonts:
+            # keep the timestamps of both saves the same
+            font.recalcTimestamp = False
+        for share_tables in (True, False):
+            stream = BytesIO()
+            collection = TTCollection()
+            collection.fonts = fonts
+            collection.save(stream, share_tables)
+            file_path = tmp_path.joinpath(f'demo-{is_ttf}-{share_tables}.ttc')
+            sfnt.save_collection(fonts, file_path, share_tables)
+            assert file_path.read_bytes() == stream.getvalue()
+
+
+def test_save_streaming(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.save_otf(tmp_path.joinpath('demo.otf'))
+    builder.save_otf(tmp_path.joinpath('demo-streaming.otf'), streaming=True)
+    assert tmp_path.joinpath('demo-streaming.otf').read_bytes() == tmp_path.joinpath('demo.otf').read_bytes()
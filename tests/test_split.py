@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+from fontTools.ttLib import TTFont
+
+from examples import demo
+from pixel_font_builder import FontBuilder, Glyph, split
+
+
+def _create_demo_builder() -> FontBuilder:
+    character_mapping, glyph_files = demo._collect_glyph_files()
+    return demo._create_builder({}, character_mapping, glyph_files)
+
+
+def test_partitions():
+    character_mapping = {0x41: 'A', 0x42: 'B', 0x43: 'C', 0x4E00: 'uni4E00', 0x4E01: 'uni4E01'}
+    assert split.partition_by_ranges(character_mapping, [(0x4E00, 0x9FFF), (0x0000, 0x0041)]) == [
+        {0x4E00: 'uni4E00', 0x4E01: 'uni4E01'},
+        {0x41: 'A'},
+        {0x42: 'B', 0x43: 'C'},
+    ]
+    assert split.partition_by_frequencies(character_mapping, {0x4E01: 9, 0x43: 5}, 2) == [
+        {0x43: 'C', 0x4E01: 'uni4E01'},
+        {0x41: 'A', 0x42: 'B'},
+        {0x4E00: 'uni4E00'},
+    ]
+    assert split.create_unicode_range([0x43, 0x41, 0x42, 0x4E00]) == 'U+0041-0043, U+4E00'
+
+
+def test_save_split(tmp_path: Path):
+    builder = _create_demo_builder()
+    partitions = split.partition_by_ranges(builder.character_mapping, [(0x0000, 0x004F)])
+    assert len(partitions) == 2
+
+    split_fonts = builder.save_split(tmp_path.joinpath('serial'), partitions, 'demo')
+    css = tmp_path.joinpath('serial', 'fonts.css').read_text('utf-8')
+    for split_font, partition in zip(split_fonts, partitions):
+        assert split_font.file_path.name in css
+        assert f'unicode-range: {split_font.unicode_range};' in css
+        font = TTFont(split_font.file_path)
+        assert font.flavor == 'woff2'
+        assert font.getBestCmap() == partition
+        assert font.getGlyphOrder() == ['.notdef', *sorted(set(partition.values()), key=builder.prepare_glyphs()[0].index)]
+
+    split_fonts = builder.save_split(tmp_path.joinpath('parallel'), partitions, 'demo', workers=2)
+    for split_font in split_fonts:
+        assert split_font.file_path.read_bytes() == tmp_path.joinpath('serial', split_font.file_path.name).read_bytes()
+
+
+def test_save_split_deduplicated(tmp_path: Path):
+    builder = _create_demo_builder()
+    glyph = builder.glyphs[-1]
+    builder.glyphs.append(Glyph(
+        name='copy',
+        horizontal_origin=glyph.horizontal_origin,
+        advance_width=glyph.advance_width,
+        vertical_origin=glyph.vertical_origin,
+        advance_height=glyph.advance_height,
+        bitmap=glyph.bitmap,
+    ))
+    builder.character_mapping[0x4E00] = 'copy'
+    builder.deduplicate_glyphs = True
+    partitions = split.partition_by_ranges(builder.character_mapping, [(0x4E00, 0x9FFF)])
+    split_fonts = builder.save_split(tmp_path, partitions, 'demo', flavor=None)
+    font = TTFont(split_fonts[0].file_path)
+    assert font.getBestCmap() == {0x4E00: glyph.name}
+    assert font.getGlyphOrder() == ['.notdef', glyph.name]
+    assert builder.character_mapping[0x4E00] == 'copy'
+
+
+def test_save_split_without_family_name(tmp_path: Path):
+    builder = _create_demo_builder()
+    builder.meta_info.family_name = None
+    partitions = split.partition_by_ranges(builder.character_mapping, [(0x0000, 0x004F)])
+    with pytest.raises(RuntimeError, match='family_name'):
+        builder.save_split(tmp_path, partitions, 'demo')